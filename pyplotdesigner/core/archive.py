@@ -0,0 +1,235 @@
+__copyright__ = """Copyright (C) 2025 George N. Wong"""
+__license__ = """
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in
+all copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+THE SOFTWARE.
+"""
+
+import mmap
+import struct
+from collections import namedtuple
+
+import numpy as np
+
+from . import binary
+from .design import Design
+
+
+MAGIC = b'PPDA'
+VERSION = 1
+
+# magic, version, flags, number of designs, offset of the index
+HEADER = struct.Struct('<4sHHIQ4x')
+
+INDEX_DTYPE = np.dtype([
+    ('figure_width', '<f8'),
+    ('figure_height', '<f8'),
+    ('n_elements', '<u8'),
+    ('offset', '<u8'),
+    ('length', '<u8'),
+    ('geometry_offset', '<u8'),
+    ('id_length', '<u8')
+])
+
+ArchiveEntry = namedtuple('ArchiveEntry', ['id', 'figure_width', 'figure_height',
+                                           'n_elements'])
+
+
+def write_archive(path, designs):
+    """
+    Write many designs into a single archive file.
+
+    Each design is stored in the binary format of Design.get_bytes(), aligned
+    so that its geometry can be memory-mapped directly. An index with the id,
+    figure size, element count, and offsets of every design is written at the
+    end of the file. Designs are written as they are produced by the iterable,
+    so the whole library never needs to be in memory at once.
+
+    :arg path: output file path
+    :arg designs: mapping or iterable of (id, Design) pairs
+    """
+    if hasattr(designs, 'items'):
+        designs = designs.items()
+
+    index = []
+    ids = []
+    with open(path, 'wb') as fp:
+        fp.write(HEADER.pack(MAGIC, VERSION, 0, 0, 0))
+        offset = HEADER.size
+        for design_id, design in designs:
+            data = design.get_bytes()
+            string_size = binary.HEADER.unpack_from(data)[-1]
+            encoded_id = str(design_id).encode('utf-8')
+            index.append((design.figure_width, design.figure_height, len(design.elements),
+                          offset, len(data), offset + binary.HEADER.size + string_size,
+                          len(encoded_id)))
+            ids.append(encoded_id)
+            fp.write(data)
+            offset += len(data)
+
+        fp.write(np.array(index, dtype=INDEX_DTYPE).tobytes())
+        fp.write(b''.join(ids))
+
+        fp.seek(0)
+        fp.write(HEADER.pack(MAGIC, VERSION, 0, len(index), offset))
+
+
+class DesignArchive:
+    """
+    Read-only, memory-mapped view of an archive written by write_archive().
+
+    Opening an archive only reads its index. Figure sizes and element counts
+    are available as arrays for filtering, the geometry of any design can be
+    viewed without copying, and single designs are decoded on demand with
+    open(), e.g.,
+
+        with DesignArchive('layouts.ppda') as archive:
+            small = archive.ids[archive.element_counts < 4]
+            design = archive.open(small[0])
+    """
+
+    def __init__(self, path):
+        """
+        Open an archive file.
+
+        :arg path: archive file path
+
+        :raises: ValueError - file is not a supported design archive
+        """
+        self._file = open(path, 'rb')
+        try:
+            self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            self._file.close()
+            raise ValueError(f"{path} is not a design archive")
+
+        if len(self._mmap) < HEADER.size:
+            self.close()
+            raise ValueError(f"{path} is not a design archive")
+        magic, version, _, count, index_offset = HEADER.unpack_from(self._mmap)
+        if magic != MAGIC or version > VERSION:
+            self.close()
+            raise ValueError(f"{path} is not a supported design archive")
+
+        self._index = np.frombuffer(self._mmap, dtype=INDEX_DTYPE, count=count,
+                                    offset=index_offset)
+        position = index_offset + self._index.nbytes
+        ids = []
+        for length in self._index['id_length'].tolist():
+            ids.append(str(self._mmap[position:position+length], 'utf-8'))
+            position += length
+        self.ids = np.array(ids, dtype=object)
+        self._positions = {design_id: i for i, design_id in reversed(list(enumerate(ids)))}
+
+    def __len__(self):
+        return len(self._index)
+
+    def __iter__(self):
+        return iter(self.ids)
+
+    def __contains__(self, design_id):
+        return design_id in self._positions
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def close(self):
+        """
+        Release the memory map and file handle. Arrays returned by
+        get_geometry() must not be used afterwards.
+        """
+        self._index = None
+        if self._mmap is not None:
+            try:
+                self._mmap.close()
+            except BufferError:
+                # geometry views are still alive; the map is released with them
+                pass
+            self._mmap = None
+        self._file.close()
+
+    @property
+    def figure_sizes(self):
+        """
+        (N, 2) array of figure width and height in inches.
+        """
+        return np.stack([self._index['figure_width'], self._index['figure_height']], axis=1)
+
+    @property
+    def element_counts(self):
+        """
+        (N,) array with the number of elements in each design.
+        """
+        return self._index['n_elements']
+
+    def _get_position(self, key):
+        if isinstance(key, (int, np.integer)):
+            if not -len(self) <= key < len(self):
+                raise IndexError(f"Archive index {key} out of range")
+            return int(key) % len(self)
+        if key not in self._positions:
+            raise KeyError(f"Design '{key}' not found in archive")
+        return self._positions[key]
+
+    def get_entry(self, key):
+        """
+        Get the index entry of a design.
+
+        :arg key: design id or position in the archive
+        :return: ArchiveEntry
+        """
+        i = self._get_position(key)
+        entry = self._index[i]
+        return ArchiveEntry(self.ids[i], float(entry['figure_width']),
+                            float(entry['figure_height']), int(entry['n_elements']))
+
+    def entries(self):
+        """
+        Get the index entries of all designs.
+
+        :return: list of ArchiveEntry
+        """
+        return [self.get_entry(i) for i in range(len(self))]
+
+    def get_geometry(self, key):
+        """
+        Get a read-only (n, 4) view of the stored x, y, width, height of each
+        element in a design, without decoding the design.
+
+        :arg key: design id or position in the archive
+        :return: NumPy array backed by the memory map
+        """
+        entry = self._index[self._get_position(key)]
+        return np.frombuffer(self._mmap, dtype='<f8', count=4 * int(entry['n_elements']),
+                             offset=int(entry['geometry_offset'])).reshape(-1, 4)
+
+    def open(self, key, **kwargs):
+        """
+        Decode a single design from the archive.
+
+        :arg key: design id or position in the archive
+        :arg kwargs: additional keyword arguments for the Design constructor
+        :return: Design instance
+        """
+        entry = self._index[self._get_position(key)]
+        start = int(entry['offset'])
+        design = Design(**kwargs)
+        design.from_bytes(memoryview(self._mmap)[start:start+int(entry['length'])])
+        return design
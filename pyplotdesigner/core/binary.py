@@ -0,0 +1,227 @@
+__copyright__ = """Copyright (C) 2025 George N. Wong"""
+__license__ = """
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in
+all copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+THE SOFTWARE.
+"""
+
+import struct
+
+import numpy as np
+
+from .models import Variable, Constant, SetValueConstraint
+
+
+MAGIC = b'PPDB'
+VERSION = 1
+
+# magic, version, flags, figure width/height, counts, string table size
+HEADER = struct.Struct('<4sHHddIIIIQ')
+
+NULL_STRING = 0xFFFFFFFF
+
+# operand kinds within constraint records
+KIND_NONE = 0
+KIND_NUMBER = 1
+KIND_ELEMENT = 2
+KIND_CONSTANT = 3
+
+ATTRIBUTES = ('x', 'y', 'width', 'height', 'right', 'top', 'center_x', 'center_y')
+ATTRIBUTE_CODES = {attr: code for code, attr in enumerate(ATTRIBUTES)}
+
+OPERAND_FIELDS = ('source', 'multiply', 'add_before', 'add_after')
+
+ELEMENT_DTYPE = np.dtype([('id', '<u4'), ('type', '<u4'), ('text', '<u4')])
+CONSTANT_DTYPE = np.dtype([('id', '<u4'), ('value', '<f8')])
+CONSTRAINT_DTYPE = np.dtype([
+    ('target', '<u4'),
+    ('target_attr', 'u1'),
+    ('kind', 'u1', (4,)),
+    ('attr', 'u1', (4,)),
+    ('ref', '<u4', (4,)),
+    ('value', '<f8', (4,))
+])
+
+
+class _StringTable:
+
+    def __init__(self):
+        self.strings = []
+        self.index = {}
+
+    def add(self, value):
+        if value is None:
+            return NULL_STRING
+        value = str(value)
+        if value not in self.index:
+            self.index[value] = len(self.strings)
+            self.strings.append(value)
+        return self.index[value]
+
+
+def _pad(data):
+    return data + b'\0' * (-len(data) % 8)
+
+
+def dumps(design):
+    """
+    Serialize a design into the binary format.
+
+    The format consists of a fixed header, a table of all distinct strings
+    (ids, types, and texts), a packed (n, 4) float64 geometry array, and
+    fixed-width records for elements, constants, and constraints in which
+    every reference is an index into one of the other tables. Each section is
+    padded to a multiple of eight bytes.
+
+    :arg design: Design instance to serialize
+    :return: bytes
+
+    :raises: ValueError - a constraint references a variable outside the design
+    """
+    strings = _StringTable()
+    element_index = {id(el): i for i, el in enumerate(design.elements)}
+    constant_index = {id(c): i for i, c in enumerate(design.constants)}
+
+    elements = np.array([(strings.add(el.id), strings.add(el.type),
+                          strings.add(el.text)) for el in design.elements],
+                        dtype=ELEMENT_DTYPE)
+    constants = np.array([(strings.add(c.id), c._value) for c in design.constants],
+                         dtype=CONSTANT_DTYPE)
+
+    def _get_reference(variable):
+        owner = variable.owner
+        if isinstance(owner, Constant) and id(owner) in constant_index:
+            return KIND_CONSTANT, 0, constant_index[id(owner)]
+        if id(owner) in element_index:
+            attr = ATTRIBUTE_CODES[variable.attr[1:]]
+            return KIND_ELEMENT, attr, element_index[id(owner)]
+        raise ValueError(f"Variable {variable} is not part of the design")
+
+    records = []
+    for constraint in design.constraints:
+        kind, target_attr, target = _get_reference(constraint.target)
+        if kind != KIND_ELEMENT:
+            raise ValueError(f"Constraint target {constraint.target} is not an element")
+        operands = []
+        for field in OPERAND_FIELDS:
+            value = getattr(constraint, field)
+            if value is None:
+                operands.append((KIND_NONE, 0, 0, 0.))
+            elif isinstance(value, Variable):
+                operands.append(_get_reference(value) + (0.,))
+            else:
+                operands.append((KIND_NUMBER, 0, 0, value))
+        kinds, attrs, refs, values = zip(*operands)
+        records.append((target, target_attr, kinds, attrs, refs, values))
+    constraints = np.array(records, dtype=CONSTRAINT_DTYPE)
+
+    encoded = [s.encode('utf-8') for s in strings.strings]
+    lengths = np.array([len(s) for s in encoded], dtype='<u4')
+    string_data = _pad(lengths.tobytes() + b''.join(encoded))
+
+    header = HEADER.pack(MAGIC, VERSION, 0, design.figure_width, design.figure_height,
+                         len(encoded), len(elements), len(constants), len(constraints),
+                         len(string_data))
+
+    geometry = design.get_geometry_array().astype('<f8')
+
+    return b''.join([
+        header,
+        string_data,
+        geometry.tobytes(),
+        _pad(elements.tobytes()),
+        _pad(constants.tobytes()),
+        _pad(constraints.tobytes())
+    ])
+
+
+def loads(data, design):
+    """
+    Populate a design from the binary format produced by dumps().
+
+    :arg data: bytes-like object, e.g., bytes or a memoryview of an mmap
+    :arg design: Design instance to add elements, constants, and constraints to
+
+    :raises: ValueError - data is not a supported design binary
+    """
+    data = memoryview(data)
+    if len(data) < HEADER.size:
+        raise ValueError("Truncated design binary")
+    magic, version, _, width, height, n_strings, n_elements, n_constants, \
+        n_constraints, string_size = HEADER.unpack_from(data)
+    if magic != MAGIC:
+        raise ValueError("Not a design binary")
+    if version > VERSION:
+        raise ValueError(f"Unsupported design binary version {version}")
+
+    offset = HEADER.size
+
+    lengths = np.frombuffer(data, dtype='<u4', count=n_strings, offset=offset)
+    position = offset + 4 * n_strings
+    strings = []
+    for length in lengths.tolist():
+        strings.append(str(data[position:position+length], 'utf-8'))
+        position += length
+    offset += string_size
+
+    def _read(dtype, count):
+        nonlocal offset
+        array = np.frombuffer(data, dtype=dtype, count=count, offset=offset)
+        offset += array.nbytes + (-array.nbytes % 8)
+        return array
+
+    def _get_string(index):
+        return None if index == NULL_STRING else strings[index]
+
+    geometry = _read('<f8', 4 * n_elements).reshape(-1, 4).tolist()
+    elements = _read(ELEMENT_DTYPE, n_elements).tolist()
+    constants = _read(CONSTANT_DTYPE, n_constants).tolist()
+    constraints = _read(CONSTRAINT_DTYPE, n_constraints).tolist()
+
+    design.set_viewport(figure_width=width, figure_height=height)
+
+    element_objects = []
+    for (x, y, w, h), (id, type, text) in zip(geometry, elements):
+        element = design.add_element(id=_get_string(id), type=_get_string(type),
+                                     x=x, y=y, width=w, height=h, text=_get_string(text))
+        element_objects.append(element)
+
+    constant_objects = []
+    for id, value in constants:
+        constant_objects.append(design.add_constant(id=_get_string(id), value=value))
+
+    def _get_operand(kind, attr, ref, value):
+        if kind == KIND_NONE:
+            return None
+        if kind == KIND_NUMBER:
+            return value
+        if kind == KIND_CONSTANT:
+            return constant_objects[ref].value
+        return getattr(element_objects[ref], ATTRIBUTES[attr])
+
+    # constraints are registered in bulk, deferring the dependency graph to
+    # the first solve
+    constraint_objects = []
+    for target, target_attr, kinds, attrs, refs, values in constraints:
+        source, multiply, add_before, add_after = \
+            (_get_operand(*operand) for operand in zip(kinds, attrs, refs, values))
+        target = getattr(element_objects[target], ATTRIBUTES[target_attr])
+        constraint_objects.append(SetValueConstraint(target=target, source=source,
+                                                     multiply=multiply,
+                                                     add_before=add_before,
+                                                     add_after=add_after))
+    design._add_constraints(constraint_objects)
@@ -0,0 +1,275 @@
+__copyright__ = """Copyright (C) 2025 George N. Wong"""
+__license__ = """
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in
+all copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+THE SOFTWARE.
+"""
+
+from numbers import Real
+
+from .models import Variable, Element
+
+
+# value of the "schema" key in JSON written by Design.get_json_string(compact=True)
+COMPACT_SCHEMA = "compact"
+
+# attributes of elements that constraints may refer to
+ELEMENT_ATTRIBUTES = frozenset(('x', 'y', 'width', 'height', 'left', 'top', 'right',
+                                'bottom', 'center_x', 'center_y'))
+
+ELEMENT_FIELDS = frozenset(('id', 'type', 'x', 'y', 'width', 'height', 'text'))
+
+# constraint inputs with their defaults when missing or unresolved
+CONSTRAINT_FIELDS = (('source', None), ('multiply', 1), ('add_before', 0), ('add_after', 0))
+
+_MISSING = object()
+
+
+class LayoutValidationError(ValueError):
+    """
+    Raised by a validating LayoutDecoder for a malformed payload.
+
+    :arg path: location of the offending value, e.g., "constraints[2].source"
+    :arg message: description of the problem
+    """
+
+    def __init__(self, path, message):
+        super().__init__(f'{path}: {message}')
+        self.path = path
+
+
+class LayoutDecoder:
+    """
+    Decodes layout payloads (the JSON representation written by
+    Design.get_json_string() and sent by the web interface) into a Design.
+
+    References to elements and constants are resolved through the ID indexes
+    of the design, so decoding is a single linear pass over the payload.
+
+    By default, decoding is lenient: constraints whose target cannot be found
+    are skipped and unresolved inputs take their default value, as when
+    loading saved files. With validate=True the payload is checked against
+    the schema during the same pass, and the first problem raises a
+    LayoutValidationError that names its location.
+    """
+
+    def __init__(self, validate=False):
+        """
+        :arg validate: (default=False) raise LayoutValidationError for
+                       malformed payloads instead of skipping what cannot be used
+        """
+        self.validate = validate
+
+    def decode(self, data, design):
+        """
+        Add the viewport, elements, constants, and constraints of a payload
+        to a design.
+
+        :arg data: decoded JSON payload as a dict
+        :arg design: Design to add to
+        :return: design
+
+        :raises: LayoutValidationError - malformed payload (only if validate=True)
+        """
+        if self.validate and not isinstance(data, dict):
+            raise LayoutValidationError('$', 'payload must be an object')
+
+        viewport = data.get('viewport', None)
+        if viewport is not None:
+            self.set_viewport(design, viewport)
+
+        compact = data.get('schema', None) == COMPACT_SCHEMA
+        for key, add in (('elements', self.add_element), ('constants', self.add_constant)):
+            items = self._get_list(data, key)
+            for i, item in enumerate(items):
+                add(design, item, path=f'{key}[{i}]')
+        constraints = self._get_list(data, 'constraints')
+        for i, constraint in enumerate(constraints):
+            self.add_constraint(design, constraint, compact=compact,
+                                path=f'constraints[{i}]')
+        return design
+
+    def _get_list(self, data, key):
+        items = data.get(key, None)
+        if items is None:
+            return ()
+        if self.validate and not isinstance(items, list):
+            raise LayoutValidationError(key, 'must be a list')
+        return items
+
+    def set_viewport(self, design, viewport):
+        """
+        Set the figure size of a design from a viewport description.
+
+        :arg design: Design to modify
+        :arg viewport: dict with 'figureWidth' and 'figureHeight'
+        """
+        width = viewport.get('figureWidth', 7)
+        height = viewport.get('figureHeight', 5)
+        if self.validate:
+            for name, value in (('figureWidth', width), ('figureHeight', height)):
+                if not _is_number(value) or value <= 0:
+                    raise LayoutValidationError(f'viewport.{name}',
+                                                'must be a positive number')
+        design.figure_width = width
+        design.figure_height = height
+
+    def add_element(self, design, element, path='element'):
+        """
+        Add an element described by a payload dict.
+
+        :arg design: Design to add to
+        :arg element: dict with id, type, x, y, width, height, and text
+        :arg path: (default='element') location used in error messages
+        :return: the new Element
+        """
+        if self.validate:
+            if not isinstance(element, dict):
+                raise LayoutValidationError(path, 'must be an object')
+            for key, value in element.items():
+                if key not in ELEMENT_FIELDS:
+                    raise LayoutValidationError(f'{path}.{key}', 'unknown field')
+                if key in ('x', 'y', 'width', 'height') and not _is_number(value):
+                    raise LayoutValidationError(f'{path}.{key}', 'must be a number')
+            if element.get('id', None) is None:
+                raise LayoutValidationError(f'{path}.id', 'is required')
+        return design.add_element(**element)
+
+    def add_constant(self, design, constant, path='constant'):
+        """
+        Add a constant described by a payload dict. Constants without an ID or
+        value are skipped unless validating.
+
+        :arg design: Design to add to
+        :arg constant: dict with id and value
+        :arg path: (default='constant') location used in error messages
+        :return: the new Constant or None
+        """
+        id = constant.get('id', None)
+        value = constant.get('value', None)
+        if self.validate:
+            if id is None:
+                raise LayoutValidationError(f'{path}.id', 'is required')
+            if not _is_number(value):
+                raise LayoutValidationError(f'{path}.value', 'must be a number')
+        if id is None or value is None:
+            return None
+        return design.add_constant(id=id, value=value)
+
+    def add_constraint(self, design, constraint, compact=False, path='constraint'):
+        """
+        Add a constraint described by a payload dict, resolving references to
+        elements and constants of the design.
+
+        In the default schema, every input is a dict {'id': ..., 'attr': ...}
+        or a number. In the compact schema, references are [id, attr] or [id],
+        missing inputs take their default value, and explicit nulls are kept.
+
+        :arg design: Design to add to
+        :arg constraint: dict with target, source, multiply, add_before, add_after
+        :arg compact: (default=False) whether the compact schema is used
+        :arg path: (default='constraint') location used in error messages
+        :return: the new SetValueConstraint or None if it was skipped
+        """
+        if self.validate and not isinstance(constraint, dict):
+            raise LayoutValidationError(path, 'must be an object')
+
+        target = self._resolve(design, constraint.get('target', None), _MISSING,
+                               f'{path}.target')
+        # constraints can only write element attributes, not constants
+        if not isinstance(target, Variable) or not isinstance(target.owner, Element):
+            if self.validate:
+                raise LayoutValidationError(f'{path}.target',
+                                            'must refer to an element attribute')
+            return None
+
+        values = []
+        for field, default in CONSTRAINT_FIELDS:
+            value = constraint.get(field, default if compact else None)
+            if compact and value is None:
+                default = None
+            values.append(self._resolve(design, value, default, f'{path}.{field}'))
+        source, multiply, before, after = values
+
+        return design.add_constraint(target=target, source=source, multiply=multiply,
+                                     add_before=before, add_after=after)
+
+    def _resolve(self, design, value, default, path):
+        """
+        Resolve a constraint input to a Variable, a float, or None.
+        """
+        if isinstance(value, dict):
+            id = value.get('id', None)
+            attr = value.get('attr', None)
+            if id is None:
+                if attr is None:
+                    return None
+                if _is_number(attr):
+                    return float(attr)
+                if not self.validate:
+                    # lenient decoding also accepts numeric strings like '0.5'
+                    try:
+                        return float(attr)
+                    except (TypeError, ValueError):
+                        pass
+                return self._invalid(path, f'invalid number {attr!r}', default)
+            if attr is None:
+                return self._get_constant(design, id, default, path)
+            return self._get_element_attribute(design, id, attr, default, path)
+        elif isinstance(value, list):
+            if len(value) == 1:
+                return self._get_constant(design, value[0], default, path)
+            if len(value) == 2:
+                return self._get_element_attribute(design, value[0], value[1], default,
+                                                   path)
+            return self._invalid(path, 'references must be [id] or [id, attr]', default)
+        elif _is_number(value):
+            return float(value)
+        elif value is None:
+            return default
+        return self._invalid(path, f'unexpected value {value!r}', default)
+
+    def _get_constant(self, design, id, default, path):
+        constant = _lookup(design._constants_by_id, id)
+        if constant is None:
+            return self._invalid(path, f"constant '{id}' not found", default)
+        return constant.value
+
+    def _get_element_attribute(self, design, id, attr, default, path):
+        element = _lookup(design._elements_by_id, id)
+        if element is None:
+            return self._invalid(path, f"element '{id}' not found", default)
+        if attr not in ELEMENT_ATTRIBUTES:
+            return self._invalid(path, f"invalid attribute '{attr}'", default)
+        return getattr(element, attr)
+
+    def _invalid(self, path, message, default):
+        if self.validate:
+            raise LayoutValidationError(path, message)
+        return default
+
+
+def _is_number(value):
+    return isinstance(value, Real) and not isinstance(value, bool)
+
+
+def _lookup(index, id):
+    try:
+        return index.get(id)
+    except TypeError:
+        # unhashable IDs cannot refer to anything
+        return None
@@ -21,11 +21,71 @@ THE SOFTWARE.
 
 
 import keyword
+import os
 import re
 import json
 import base64
+from collections import Counter
 
 from .models import Variable, Element, Constant, SetValueConstraint
+from .solver import ConstraintGraph
+from .streaming import iter_sections, iter_text_chunks, SECTION_START
+from . import json_backend
+from .decoding import LayoutDecoder, COMPACT_SCHEMA
+
+
+# resolution used to order elements with identical type and text
+GEOMETRY_QUANTUM = 1.e-6
+
+
+def _get_geometry_key(element):
+    return tuple(round(value / GEOMETRY_QUANTUM) for value in
+                 (element._x, element._y, element._width, element._height))
+
+
+def _get_constraint_key(constraint, labels):
+    """
+    Get a hashable key for a constraint that is equal for equivalent
+    constraints in different designs, i.e., one that refers to elements by
+    the label they were matched up with and to constants by (id, value)
+    rather than by object.
+
+    :arg constraint: SetValueConstraint to describe
+    :arg labels: dict mapping id(element) to a label that is shared by the
+                 matching element of the other design
+    """
+    key = []
+    for value in (constraint.target, constraint.source, constraint.multiply,
+                  constraint.add_before, constraint.add_after):
+        if isinstance(value, Variable):
+            owner = value.owner
+            if isinstance(owner, Constant):
+                key.append(('constant', owner.id, owner._value, value.attr))
+            else:
+                label = labels.get(id(owner), (owner.type, owner.text, None))
+                key.append(('element', label, value.attr))
+        else:
+            key.append(('value', value))
+    return tuple(key)
+
+
+def _match_elements(elements, others):
+    """
+    Pair up each element with an equal element of another list.
+
+    :return: list of the other elements in the order of elements, or None
+             if some element has no match
+    """
+    remaining = list(others)
+    matched = []
+    for el in elements:
+        for index, other in enumerate(remaining):
+            if el == other:
+                matched.append(remaining.pop(index))
+                break
+        else:
+            return None
+    return matched
 
 
 class Design:
@@ -38,19 +98,76 @@ class Design:
     resolved.
     """
 
-    def __init__(self, figure_width=7, figure_height=5):
+    def __init__(self, figure_width=7, figure_height=5, storage="objects"):
         """
         Initialize a new constraint-solving engine with empty elements and constraints.
 
         :arg figure_width: (default=7) width of the figure in inches
         :arg figure_height: (default=5) height of the figure in inches
+        :arg storage: (default="objects") how element geometry is stored, either
+                      "objects" for per-element attributes or "array" for a
+                      contiguous (n, 4) NumPy array shared by all elements
         """
-        self.elements = []
-        self.constraints = []
+        if storage not in ("objects", "array"):
+            raise ValueError(f"Unknown storage mode '{storage}'")
+        self.storage = storage
+        if storage == "array":
+            # NumPy is only imported for array storage and vectorized solving
+            from .storage import GeometryStore
+            self._store = GeometryStore()
+        else:
+            self._store = None
+        # elements and constraints keyed by id() in insertion order, so that
+        # they can be removed without scanning; the lists are built on demand
+        self._elements = {}
+        self._constraints = {}
+        self._element_list = []
+        self._constraint_list = []
         self.constants = []
         self.figure_width = figure_width
         self.figure_height = figure_height
 
+        # lookup of elements and constants by id, where later elements with
+        # an id that is already taken wait in _shadowed_elements
+        self._elements_by_id = {}
+        self._shadowed_elements = {}
+        self._constants_by_id = {}
+        self._id_counters = {}
+
+        # lookup of constraints by the objects they reference and by target
+        self._constraints_by_owner = {}
+        self._constraints_by_target = {}
+        self._constraint_owners = {}
+
+        # cached dependency graph and changes since the last solve
+        self._graph = ConstraintGraph()
+        self._dirty_slots = set()
+        self._dirty_constraints = []
+        self._graph_stale = False
+        self._needs_full_solve = True
+        self._solving = False
+        self._plan = None
+
+    @property
+    def elements(self):
+        """
+        List of elements in the order they were added. It should not be
+        modified directly; use add_element() and remove_element_by_id().
+        """
+        if self._element_list is None:
+            self._element_list = list(self._elements.values())
+        return self._element_list
+
+    @property
+    def constraints(self):
+        """
+        List of constraints in the order they were added. It should not be
+        modified directly; use add_constraint() and remove_constraint().
+        """
+        if self._constraint_list is None:
+            self._constraint_list = list(self._constraints.values())
+        return self._constraint_list
+
     # set and get general design properties
 
     def print_info(self):
@@ -89,20 +206,37 @@ class Design:
         """
         return self.figure_height
 
+    def get_geometry_array(self):
+        """
+        Get the geometry of all elements as an (n, 4) array with columns
+        x, y, width, height in the order of self.elements.
+
+        :return: NumPy array (a view of the storage when storage="array")
+        """
+        if self._store is not None:
+            return self._store.data
+        import numpy as np
+        return np.array([[el._x, el._y, el._width, el._height] for el in self.elements],
+                        dtype=float).reshape(-1, 4)
+
     def get_unique_id(self, prefix="widget-"):
         """
-        Generate a unique identifier for a new element based on the current
-        number of elements.
+        Generate a unique identifier of the form {prefix}{n} that is not used
+        by any element or constant.
+
+        A counter is kept for each prefix so that n only ever increases and
+        previously taken IDs are skipped once, which makes repeated calls
+        amortized O(1).
 
         :arg prefix: prefix for the ID (default="widget-")
         :return: unique ID string
         """
-        for nid in range(10000):
-            unique_id = f"{prefix}{nid}"
-            if not any(el.id == unique_id for el in self.elements) and \
-               not any(c.id == unique_id for c in self.constants):
-                return unique_id
-        raise RuntimeError("Failed to generate unique ID after 10000 attempts")
+        nid = self._id_counters.get(prefix, 0)
+        while f"{prefix}{nid}" in self._elements_by_id or \
+                f"{prefix}{nid}" in self._constants_by_id:
+            nid += 1
+        self._id_counters[prefix] = nid
+        return f"{prefix}{nid}"
 
     def is_equivalent_to(self, other, verbose=False):
         """
@@ -144,126 +278,235 @@ class Design:
                       len(self.constants), 'vs', len(other.constants))
             return False
 
-        for el in self.elements:
-            if el not in other.elements:
+        # elements are bucketed by (type, text) and all geometry is then
+        # compared with a single vectorized tolerance check
+        own_buckets = self._get_element_buckets()
+        other_buckets = other._get_element_buckets()
+        own_elements = []
+        other_elements = []
+        for key, elements in own_buckets.items():
+            others = other_buckets.get(key, [])
+            if len(others) != len(elements):
+                if verbose:
+                    print('Element', elements[0].id, 'not found in other design')
+                return False
+            own_elements += elements
+            other_elements += others
+
+        import numpy as np
+        own_geometry = np.array([[el._x, el._y, el._width, el._height]
+                                 for el in own_elements], dtype=float).reshape(-1, 4)
+        other_geometry = np.array([[el._x, el._y, el._width, el._height]
+                                   for el in other_elements], dtype=float).reshape(-1, 4)
+        close = np.isclose(own_geometry, other_geometry).all(axis=1)
+        realigned = set()
+        for index in np.flatnonzero(~close):
+            # near-equal values may have been quantized into different orders
+            # within a bucket, so fall back to matching up the bucket by search
+            el = own_elements[index]
+            key = (el.type, el.text)
+            if key in realigned:
+                continue
+            realigned.add(key)
+            matched = _match_elements(own_buckets[key], other_buckets[key])
+            if matched is None:
                 if verbose:
                     print('Element', el.id, 'not found in other design')
                 return False
-
-        for constant in self.constants:
-            if constant not in other.constants:
+            other_buckets[key] = matched
+
+        # constraints refer to elements through the position of the matched
+        # pair within its bucket, where equal neighbours share a label
+        own_labels = {}
+        other_labels = {}
+        for key, elements in own_buckets.items():
+            label = None
+            for index, (el, match) in enumerate(zip(elements, other_buckets[key])):
+                if index == 0 or el != elements[index - 1]:
+                    label = key + (index,)
+                own_labels[id(el)] = label
+                other_labels[id(match)] = label
+
+        other_constants = Counter((c.id, c._value) for c in other.constants)
+        for constant, count in Counter((c.id, c._value) for c in self.constants).items():
+            if other_constants[constant] != count:
                 if verbose:
-                    print('Constant', constant.id, 'not found in other design')
+                    print('Constant', constant[0], 'not found in other design')
                 return False
 
+        other_constraints = Counter(_get_constraint_key(c, other_labels)
+                                    for c in other.constraints)
+        own_constraints = Counter()
         for constraint in self.constraints:
-            if constraint not in other.constraints:
+            key = _get_constraint_key(constraint, own_labels)
+            own_constraints[key] += 1
+            if own_constraints[key] > other_constraints[key]:
                 if verbose:
                     print('Constraint', constraint, 'not found in other design')
                 return False
 
         return True
 
-    def solve(self, verbose=False):
+    def _get_element_buckets(self):
+        """
+        Group elements by (type, text), ordering each group by quantized
+        geometry so that matching elements line up between designs.
+
+        :return: dict mapping (type, text) to a list of elements
+        """
+        buckets = {}
+        for el in self.elements:
+            buckets.setdefault((el.type, el.text), []).append(el)
+        for elements in buckets.values():
+            if len(elements) > 1:
+                elements.sort(key=_get_geometry_key)
+        return buckets
+
+    def solve(self, verbose=False, full=False, vectorize=False):
         """
         Solve all registered constraints to compute final positions and
         dimensions for all elements.
 
-        This method will apply constraints in a valid order based on their
-        dependencies, ensuring that all required inputs are resolved before
-        applying each constraint.
+        A single dependency graph is built over the storage slots of element
+        attributes and constants (computed variables like 'right' resolve to
+        the base attributes they read and write). Constraints are then ordered
+        topologically and each one is applied exactly once.
+
+        The graph is cached between calls. Changes made through Variable.set()
+        and SetValueConstraint.set_attribute() are recorded, and subsequent
+        solves only re-apply the constraints downstream of those changes.
+        Values assigned directly to element attributes (e.g., element._x) are
+        not tracked and require a full solve.
+
+        With vectorize=True, the constraints are compiled into a SolvePlan
+        (cached until the design structure changes) and every constraint is
+        evaluated level by level with NumPy, which is much faster for large
+        designs than applying constraints one at a time.
 
         :arg verbose: (default=False) print order of applied constraints
+        :arg full: (default=False) re-apply every constraint
+        :arg vectorize: (default=False) evaluate a compiled SolvePlan
+        :return: list of the constraints that were applied, in order, e.g., to
+                 find the elements that an incremental solve may have moved
 
         :raises: RuntimeError - circular or unsatisfiable constraint detected
         """
-        for _ in range(len(self.constraints)):
-            self._solve_once(verbose=verbose)
+        self._sync_graph()
+
+        if vectorize:
+            if self._plan is None:
+                from .plan import SolvePlan
+                self._plan = SolvePlan(self, graph=self._graph)
+            values = self._plan.get_values(self)
+            self._plan.evaluate(values)
+            self._plan.set_values(self, values)
+            self._dirty_slots = set()
+            self._dirty_constraints = []
+            self._needs_full_solve = False
+            if verbose:
+                print("Constraints applied in", len(self._plan.levels), "levels")
+            return self.constraints
+
+        if full or self._needs_full_solve:
+            order = self._graph.order()
+        else:
+            cone = self._graph.get_downstream(self._dirty_constraints, self._dirty_slots)
+            order = self._graph.order(cone)
+
+        self._solving = True
+        try:
+            for constraint in order:
+                constraint.apply()
+        finally:
+            self._solving = False
+
+        self._dirty_slots = set()
+        self._dirty_constraints = []
+        self._needs_full_solve = False
+
+        if verbose:
+            print("Constraints applied in order:")
+            for c in order:
+                print("  ", c)
+
+        return order
 
-    def _solve_once(self, verbose=False):
+    def compile(self):
         """
-        Solve all registered constraints in a valid order based on
-        their dependencies.
+        Compile the constraints of this design into a reusable SolvePlan.
 
-        Works by identifying all known variables (those not assigned by a
-        constraint) and then repeatedly applying constraints whose inputs
-        variables are already resolved. If no progress has been made in a
-        step but constraints remain, then we assume that an unsatisfiable
-        or circular dependency exists and raise a RuntimeError.
+        The plan freezes the dependency graph, evaluation order, and storage
+        slots of the design, so that it can be solved repeatedly for different
+        constant values without touching the Design or its elements, e.g.,
 
-        :arg verbose: (default=False) print order of applied constraints
+            plan = design.compile()
+            geometry = plan.solve(constants={'spacing': 0.2})
+            geometries = plan.solve_batch([[0.1], [0.2]], constant_ids=['spacing'])
+
+        :return: SolvePlan instance
 
         :raises: RuntimeError - circular or unsatisfiable constraint detected
         """
-        resolved = set()
+        from .plan import SolvePlan
+        self._sync_graph()
+        self._plan = SolvePlan(self, graph=self._graph)
+        return self._plan
 
-        # start with all known values from the elements
-        for element in self.elements:
-            for attr in element.get_valid_attributes():
-                var = getattr(element, attr, None)
-                if isinstance(var, Variable):
-                    resolved.add(var)
-        for constant in self.constants:
-            resolved.add(constant.value)
+    def solve_batch(self, constant_values, constant_ids=None, processes=None):
+        """
+        Solve the design for many assignments of constant values at once,
+        e.g., one row per journal format with different widths and spacings.
+        The design itself is not modified.
+
+        :arg constant_values: (N, k) array with one row per scenario
+        :arg constant_ids: (default=None) IDs of the k constants in column
+                           order, or None to use all constants in design order
+        :arg processes: (default=None) number of worker processes to split
+                        very large batches across, or None to solve in-process
+        :return: (N, n_elements, 4) array of x, y, width, height per element
+                 in the order of self.elements
 
-        # remove targets since they are assigned via constraints
-        for constraint in self.constraints:
-            if constraint.target in resolved:
-                resolved.remove(constraint.target)
+        :raises: RuntimeError - circular or unsatisfiable constraint detected
+        :raises: ValueError - unknown constant ID or mismatched array shape
+        """
+        return self.compile().solve_batch(constant_values, constant_ids=constant_ids,
+                                          processes=processes)
 
-        # map constraints to their input dependencies
-        dependency_map = {}
-        for constraint in self.constraints:
-            deps = set()
-            for attr in ['source', 'add_before', 'add_after', 'multiply']:
-                v = getattr(constraint, attr, None)
-                if hasattr(v, 'get'):
-                    deps.add(v)
-            dependency_map[constraint] = deps
-
-        applied = set()
-
-        # repeatedly apply constraints with all inputs resolved
-        while len(applied) < len(self.constraints):
-            progress = False
-            for constraint in self.constraints:
-                if constraint in applied:
-                    continue
-                if all(dep in resolved for dep in dependency_map[constraint]):
-                    constraint.apply()
-                    applied.add(constraint)
-                    resolved.add(constraint.target)
-                    progress = True
-            if not progress:
-                raise RuntimeError("Circular or unsatisfiable constraint detected")
+    def _sync_graph(self):
+        """
+        Rebuild the cached dependency graph if constraints were registered
+        without updating it, i.e., by _add_constraints().
+        """
+        if self._graph_stale:
+            self._graph = ConstraintGraph(self.constraints)
+            self._graph_stale = False
+            self._needs_full_solve = True
+            self._plan = None
 
-        if verbose:
-            print("Constraints applied in order:")
-            for c in applied:
-                print("  ", c)
+    def _mark_dirty(self, variable):
+        """
+        Record that a variable was set outside of the solver.
 
-    # input/output utilities
+        :arg variable: Variable whose storage was modified
+        """
+        if not self._solving:
+            self._dirty_slots.update(variable.get_write_slots())
 
-    def _get_attribute_or_value_from_json(self, val, default):
-        if isinstance(val, dict):
-            id = val.get('id', None)
-            attr = val.get('attr', None)
-            if id is None:
-                if attr is None:
-                    return None
-                return float(attr)
-            if attr is None:
-                try:
-                    return self.get_constant_value(id)
-                except ValueError:
-                    return default
-            try:
-                return self.get_element_attribute(id, attr)
-            except ValueError:
-                return default
-        elif isinstance(val, (int, float)):
-            return float(val)
-        return default
+    def _mark_constraint_dirty(self, constraint):
+        """
+        Record that a constraint was modified and update its dependencies.
+
+        :arg constraint: SetValueConstraint that was modified
+        """
+        if constraint in self._graph:
+            self._graph.update(constraint)
+        if id(constraint) in self._constraint_owners:
+            self._unindex_constraint(constraint)
+            self._index_constraint(constraint)
+        self._dirty_constraints.append(constraint)
+        self._plan = None
+
+    # input/output utilities
 
     def get_python_commands(self):
         """
@@ -382,49 +625,71 @@ class Design:
 
         :arg json_str: JSON-encoded design dictionary
         """
-        data = json.loads(json_str)
-
-        elements = data.get("elements", [])
-        constraints = data.get("constraints", [])
-        constants = data.get("constants", [])
-        viewport = data.get("viewport", None)
+        LayoutDecoder().decode(json.loads(json_str), self)
 
-        if viewport is not None:
-            self.figure_width = viewport.get('figureWidth', 7)
-            self.figure_height = viewport.get('figureHeight', 5)
-
-        for el in elements:
-            self.add_element(**el)
-
-        for constant in constants:
-            id = constant.get('id')
-            value = constant.get('value')
-            if id is not None and value is not None:
-                self.add_constant(id=id, value=value)
+    def load_stream(self, source, chunk_size=1 << 20):
+        """
+        Load a Design incrementally from a file containing either the JSON
+        string or the base64-encoded JSON string representation.
 
-        for constraint in constraints:
-            target_def = constraint.get('target')
-            source = self._get_attribute_or_value_from_json(constraint.get('source'), None)
-            multiply = self._get_attribute_or_value_from_json(constraint.get('multiply'), 1)
-            before = self._get_attribute_or_value_from_json(constraint.get('add_before'), 0)
-            after = self._get_attribute_or_value_from_json(constraint.get('add_after'), 0)
+        Elements, constants, and constraints are added as they are read, and
+        base64 content is decoded chunk by chunk, so very large files are never
+        held in memory as a whole. Constraints that appear before the elements
+        and constants they reference (as in files written by older versions)
+        are resolved once the end of the file has been reached.
 
-            if target_def is None:
-                continue
+        :arg source: path, or binary or text file-like object
+        :arg chunk_size: (default=1MiB) number of bytes to read at a time
+        """
+        if isinstance(source, (str, os.PathLike)):
+            with open(source, 'rb') as fp:
+                self.load_stream(fp, chunk_size=chunk_size)
+            return
 
-            try:
-                target = self.get_element_attribute(target_def.get('id'),
-                                                    target_def.get('attr'))
-            except ValueError:
+        decoder = LayoutDecoder()
+        deferred = []
+        finished = set()
+        section = None
+        compact = False
+        chunks = iter_text_chunks(source, chunk_size=chunk_size)
+        for key, value in iter_sections(chunks, announce=True):
+            # a section is finished once the next one starts, even if it was empty
+            if key != section:
+                finished.add(section)
+                section = key
+            if value is SECTION_START:
                 continue
-
-            self.add_constraint(target=target, source=source, multiply=multiply,
-                                add_before=before, add_after=after)
-
-    def get_json_string(self):
+            if key == 'schema':
+                compact = value == COMPACT_SCHEMA
+            elif key == 'elements':
+                decoder.add_element(self, value)
+            elif key == 'constants':
+                decoder.add_constant(self, value)
+            elif key == 'constraints':
+                if 'elements' in finished and 'constants' in finished:
+                    decoder.add_constraint(self, value, compact=compact)
+                else:
+                    deferred.append(value)
+            elif key == 'viewport' and value is not None:
+                decoder.set_viewport(self, value)
+
+        for constraint in deferred:
+            decoder.add_constraint(self, constraint, compact=compact)
+
+    def get_json_string(self, compact=False):
         """
         Convert the current design to a JSON string representation.
 
+        The default schema is the one used by the web UI. The compact schema
+        omits constraint fields that have their default values and refers to
+        element attributes and constants as [id, attr] and [id] respectively,
+        which makes it considerably smaller and faster to produce. Both are
+        understood by from_json_string(), load(), and load_stream().
+
+        The encoder can be changed, e.g., to orjson, with
+        pyplotdesigner.core.json_backend.set_json_encoder().
+
+        :arg compact: (default=False) whether to use the compact schema
         :return: JSON string representing the design layout
         """
 
@@ -434,32 +699,62 @@ class Design:
 
         for el in self.elements:
             elements.append(el.to_dict())
-        for constraint in self.constraints:
-            constraints.append(constraint.to_dict())
+        if compact:
+            for constraint in self.constraints:
+                constraints.append(constraint.to_compact_dict())
+        else:
+            for constraint in self.constraints:
+                constraints.append(constraint.to_dict())
         for constant in self.constants:
             constants.append(constant.to_dict())
 
+        # constants precede constraints so that streaming readers can resolve
+        # constraint references as soon as they are read
         payload = dict(
             elements=elements,
-            constraints=constraints,
             constants=constants,
+            constraints=constraints,
             viewport=dict(
                 figureWidth=self.get_figure_width(),
                 figureHeight=self.get_figure_height()
             )
         )
 
-        return json.dumps(payload, indent=None, separators=(',', ':'))
+        if compact:
+            payload = dict(schema=COMPACT_SCHEMA, **payload)
 
-    def get_b64_string(self):
+        return json_backend.dumps(payload)
+
+    def get_b64_string(self, compact=False):
         """
         Get the base64-encoded JSON string representation of the design.
 
+        :arg compact: (default=False) whether to use the compact schema
         :return: base64-encoded JSON string
         """
-        json_str = self.get_json_string()
+        json_str = self.get_json_string(compact=compact)
         return base64.b64encode(json_str.encode('utf-8')).decode('utf-8')
 
+    def get_bytes(self):
+        """
+        Get the compact binary representation of the design, which stores a
+        string table, packed float64 geometry, and fixed-width constraint
+        records. See pyplotdesigner.core.binary for the format.
+
+        :return: bytes
+        """
+        from . import binary
+        return binary.dumps(self)
+
+    def from_bytes(self, data):
+        """
+        Load a Design instance from its binary representation.
+
+        :arg data: bytes-like object produced by get_bytes()
+        """
+        from . import binary
+        binary.loads(data, self)
+
     # constant utilities
 
     def add_constant(self, id=None, value=0.0):
@@ -472,7 +767,10 @@ class Design:
         if id is None:
             id = self.get_unique_id(prefix="constant")
         constant = Constant(id=id, value=value)
+        constant._design = self
         self.constants.append(constant)
+        self._constants_by_id.setdefault(id, constant)
+        self._plan = None
         return constant
 
     def get_constant(self, id):
@@ -484,10 +782,7 @@ class Design:
         """
         if id is None:
             return None
-        for constant in self.constants:
-            if constant.id == id:
-                return constant
-        return None
+        return self._constants_by_id.get(id)
 
     def update_constant(self, id, constant):
         """
@@ -503,20 +798,25 @@ class Design:
         if new_id is None or new_value is None:
             return
 
-        existing_constant = next((c for c in self.constants if c.id == id), None)
+        existing_constant = self._constants_by_id.get(id)
         if existing_constant is None:
             return
 
         # check if the new constant id already exists
-        if any(c.id == new_id for c in self.constants if c.id != id):
+        if new_id != id and new_id in self._constants_by_id:
             print(f"Constant with id '{new_id}' already exists, cannot update.")
             return
 
         # update the existing constant
+        if new_id != id:
+            del self._constants_by_id[id]
+            self._constants_by_id[new_id] = existing_constant
         existing_constant.id = new_id
         existing_constant.value.set(new_value)
 
-        # TODO, check all constraints for references to this constant and update appropriately
+        # constraints hold a reference to the constant itself rather than its id,
+        # so those in get_referencing_constraints(existing_constant) are renamed
+        # implicitly and the new value is picked up on the next solve
 
     def get_constant_value(self, constant):
         """
@@ -528,7 +828,7 @@ class Design:
             return None
         if isinstance(constant, Constant):
             return constant.value
-        const = next((c for c in self.constants if c.id == constant), None)
+        const = self._constants_by_id.get(constant)
         if const is None:
             raise ValueError(f"Constant with ID '{constant}' not found")
         return const.value
@@ -542,14 +842,16 @@ class Design:
 
         :arg element_type: type of the element to create (default="axis")
         :arg id: unique identifier for the element (default=None, auto-generated)
+        :return: the new element
         """
         if id is None:
             id = self.get_unique_id(prefix=f"{element_type}-")
         if text is None:
             text = id
-        x = 0.1 * len(self.elements)
-        y = 0.1 * len(self.elements)
-        self.add_element(id=id, type=element_type, x=x, y=y, width=1, height=1, text=text)
+        x = 0.1 * len(self._elements)
+        y = 0.1 * len(self._elements)
+        return self.add_element(id=id, type=element_type, x=x, y=y, width=1, height=1,
+                                text=text)
 
     def get_element(self, element_id):
         """
@@ -558,10 +860,7 @@ class Design:
         :arg element_id: ID of the element to retrieve
         :return: element object if found or None
         """
-        for element in self.elements:
-            if element.id == element_id:
-                return element
-        return None
+        return self._elements_by_id.get(element_id)
 
     def remove_element_by_id(self, element_id):
         """
@@ -574,13 +873,32 @@ class Design:
         if element is None:
             return
 
-        new_constraints = []
-        for constraint in self.constraints:
-            if not constraint.includes_element(element):
-                new_constraints.append(constraint)
-        self.constraints = new_constraints
-
-        self.elements.remove(element)
+        for constraint in self.get_referencing_constraints(element):
+            self.remove_constraint(constraint)
+
+        # array storage keeps rows in element order, so later rows shift up
+        # and the removed element keeps a private copy of its geometry
+        if self._store is not None:
+            index = element._index
+            following = self.elements[index+1:]
+            element.detach()
+            self._store.remove(index)
+            for el in following:
+                el._index -= 1
+        element._design = None
+
+        del self._elements[id(element)]
+        self._element_list = None
+        self._plan = None
+
+        # fall back to the next element that shares the same id
+        shadowed = self._shadowed_elements.get(element_id)
+        if shadowed:
+            self._elements_by_id[element_id] = shadowed.pop(0)
+            if not shadowed:
+                del self._shadowed_elements[element_id]
+        else:
+            del self._elements_by_id[element_id]
 
     def get_element_attribute(self, element_id, attr):
         """
@@ -607,10 +925,31 @@ class Design:
         """
         if text is None and type == 'axis':
             text = id
-        el = Element(id=id, type=type, x=x, y=y, width=width, height=height, text=text)
-        self.elements.append(el)
+        if self._store is not None:
+            from .storage import ArrayElement
+            el = ArrayElement(self._store, id=id, type=type, x=x, y=y,
+                              width=width, height=height, text=text)
+        else:
+            el = Element(id=id, type=type, x=x, y=y, width=width, height=height, text=text)
+        el._design = self
+        self._register_element(el)
         return el
 
+    def _register_element(self, el):
+        """
+        Track a new element in insertion order and in the lookup by id.
+
+        :arg el: Element to register
+        """
+        self._elements[id(el)] = el
+        if self._element_list is not None:
+            self._element_list.append(el)
+        if el.id in self._elements_by_id:
+            self._shadowed_elements.setdefault(el.id, []).append(el)
+        else:
+            self._elements_by_id[el.id] = el
+        self._plan = None
+
     def add_constraint(self, target=None, source=None, multiply=1.,
                        add_before=0., add_after=0.):
         """
@@ -630,9 +969,53 @@ class Design:
             multiply=multiply, add_before=add_before, add_after=add_after
         )
         if constraint is not None:
-            self.constraints.append(constraint)
+            constraint._design = self
+            self._constraints[id(constraint)] = constraint
+            if self._constraint_list is not None:
+                self._constraint_list.append(constraint)
+            self._graph.add(constraint)
+            self._index_constraint(constraint)
+            self._dirty_constraints.append(constraint)
+            self._plan = None
         return constraint
 
+    def _add_constraints(self, constraints):
+        """
+        Register many new constraints at once, e.g., while loading a design.
+        They are indexed immediately, but the dependency graph is only rebuilt
+        by the next solve instead of being updated for each constraint.
+
+        :arg constraints: list of SetValueConstraint objects
+        """
+        for constraint in constraints:
+            constraint._design = self
+            self._constraints[id(constraint)] = constraint
+            self._index_constraint(constraint)
+        self._constraint_list = None
+        self._graph_stale = True
+        self._plan = None
+
+    def remove_constraint(self, constraint):
+        """
+        Remove a constraint that was registered with add_constraint(). Values
+        it already assigned are kept until other constraints change them; the
+        slot it wrote is re-solved by any remaining constraint that writes it.
+
+        :arg constraint: SetValueConstraint to remove
+        :return: True if the constraint was found and removed
+        """
+        if id(constraint) not in self._constraint_owners:
+            return False
+        self._unindex_constraint(constraint)
+        self._graph.remove(constraint)
+        del self._constraints[id(constraint)]
+        self._constraint_list = None
+        self._plan = None
+        # other writers of the same slot, and everything downstream, may now
+        # produce a different value
+        self._dirty_slots.update(constraint.target.get_write_slots())
+        return True
+
     def get_constraint(self, target_element, target_attribute):
         """
         Get the constraint that sets target_element.target_attribute if
@@ -646,8 +1029,66 @@ class Design:
             return None
         if not isinstance(target_element, Element):
             target_element = self.get_element(target_element)
-        for constraint in self.constraints:
-            if constraint.target.owner == target_element and \
-               constraint.target.attr[1:] == target_attribute:
-                return constraint
-        return None
+        target = (id(target_element), target_attribute)
+        constraints = self._constraints_by_target.get(target)
+        if not constraints:
+            return None
+        return next(iter(constraints.values()))
+
+    def get_referencing_constraints(self, owner):
+        """
+        Get all constraints that reference an element or constant as their
+        target or in any of their inputs.
+
+        :arg owner: Element or Constant object, or its ID
+        :return: list of constraints in registration order
+        """
+        if isinstance(owner, str):
+            owner = self.get_element(owner) or self.get_constant(owner)
+        return list(self._constraints_by_owner.get(id(owner), {}).values())
+
+    def get_constraints_writing(self, variable):
+        """
+        Get all constraints whose target writes the same storage as a
+        variable, including aliases like 'left' for 'x' and computed targets
+        like 'right' or 'center_x' that solve for 'x'.
+
+        :arg variable: element Variable, e.g., element.x
+        :return: list of constraints in registration order
+        """
+        slots = set(variable.get_write_slots())
+        constraints = self._constraints_by_owner.get(id(variable.owner), {}).values()
+        return [c for c in constraints
+                if not slots.isdisjoint(c.target.get_write_slots())]
+
+    def _index_constraint(self, constraint):
+        """
+        Register a constraint in the lookups by referenced owner and target.
+
+        :arg constraint: SetValueConstraint to index
+        """
+        owners = set()
+        for value in (constraint.target, constraint.source, constraint.multiply,
+                      constraint.add_before, constraint.add_after):
+            if isinstance(value, Variable):
+                owners.add(id(value.owner))
+        for owner in owners:
+            self._constraints_by_owner.setdefault(owner, {})[id(constraint)] = constraint
+        target = (id(constraint.target.owner), constraint.target.attr[1:])
+        self._constraints_by_target.setdefault(target, {})[id(constraint)] = constraint
+        self._constraint_owners[id(constraint)] = (owners, target)
+
+    def _unindex_constraint(self, constraint):
+        """
+        Remove a constraint from the lookups by referenced owner and target.
+
+        :arg constraint: SetValueConstraint to remove
+        """
+        owners, target = self._constraint_owners.pop(id(constraint))
+        for owner in owners:
+            del self._constraints_by_owner[owner][id(constraint)]
+            if not self._constraints_by_owner[owner]:
+                del self._constraints_by_owner[owner]
+        del self._constraints_by_target[target][id(constraint)]
+        if not self._constraints_by_target[target]:
+            del self._constraints_by_target[target]
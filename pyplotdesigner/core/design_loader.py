@@ -20,9 +20,94 @@ THE SOFTWARE.
 """
 
 
-import matplotlib.pyplot as plt
+import os
+import base64
+from collections import deque
+
 from pyplotdesigner.core.design import Design
 
+# matplotlib is imported when the first figure is built, so that importing
+# this module stays cheap for code that only solves or serializes designs
+
+
+class FigureTemplate:
+    """
+    The solved layout of a Design in figure coordinates, which can be used
+    to build any number of figures without solving the design again.
+
+    Figures are built with the object-oriented matplotlib API on an Agg
+    canvas, so they are not registered with pyplot and need not be closed,
+    which makes templates suitable for rendering many figures in batch jobs:
+
+        template = FigureTemplate(design)
+        for data in datasets:
+            fig, axes = template.make_figure()
+            axes['left'].plot(data)
+            fig.savefig(...)
+    """
+
+    def __init__(self, design, solve=True):
+        """
+        :arg design: Design object containing layout information
+        :arg solve: (default=True) solve the design first, which can be
+                    skipped if it has been solved since it was last modified
+        """
+        if solve:
+            design.solve()
+
+        width = design.figure_width
+        height = design.figure_height
+        self.figsize = (width, height)
+        self.labels = []
+        self.rects = []
+        for el in design.elements:
+            self.labels.append(el.text)
+            self.rects.append((el._x/width, el._y/height,
+                               el._width/width, el._height/height))
+
+    @classmethod
+    def from_b64(cls, json_b64):
+        """
+        Build a template from a base64-encoded JSON design layout.
+
+        :arg json_b64: base64-encoded JSON string
+        :return: FigureTemplate
+        """
+        design = Design()
+        design.load(json_b64)
+        return cls(design)
+
+    def add_axes(self, fig):
+        """
+        Add one Axes per element of the layout to a figure.
+
+        :arg fig: matplotlib Figure
+        :return: Dict[str, Axes] keyed by element text
+        """
+        axes = dict()
+        for label, rect in zip(self.labels, self.rects):
+            axes[label] = fig.add_axes(rect, label=label)
+        return axes
+
+    def make_figure(self, figure=None, **kwargs):
+        """
+        Create a new Figure with the layout of the template, or clear and
+        lay out an existing one.
+
+        :arg figure: (default=None) Figure to reuse instead of creating one
+        :arg kwargs: additional keyword arguments for matplotlib Figure creation
+        :return: (Figure, Dict[str, Axes])
+        """
+        if figure is None:
+            from matplotlib.figure import Figure
+            from matplotlib.backends.backend_agg import FigureCanvasAgg
+            figure = Figure(figsize=self.figsize, **kwargs)
+            FigureCanvasAgg(figure)
+        else:
+            figure.clear()
+            figure.set_size_inches(self.figsize)
+        return figure, self.add_axes(figure)
+
 
 def make_figure_from_b64(json_b64, **kwargs):
     """
@@ -30,7 +115,7 @@ def make_figure_from_b64(json_b64, **kwargs):
     build the Design object, and return a matplotlib Figure and Axes.
 
     :arg json_b64: base64-encoded JSON string
-    :arg kwargs: additional keyword arguments for matplotlib figure creation
+    :arg kwargs: additional keyword arguments for make_figure_from_design()
     :return: (Figure, Dict[str, Axes])
     """
 
@@ -38,28 +123,132 @@ def make_figure_from_b64(json_b64, **kwargs):
     design.load(json_b64)
     design.solve()
 
-    return make_figure_from_design(design, **kwargs)
+    return make_figure_from_design(design, solve=False, **kwargs)
 
 
-def make_figure_from_design(design, **kwargs):
+def make_figure_from_design(design, solve=True, pyplot=True, **kwargs):
     """
     Create a matplotlib Figure and Axes from a Design object.
 
     :arg design: Design object containing layout information
+    :arg solve: (default=True) solve the design first
+    :arg pyplot: (default=True) create the figure through pyplot, or with
+                 pyplot=False as a standalone Figure on an Agg canvas
     :arg kwargs: additional keyword arguments for matplotlib figure creation
     :return: (Figure, Dict[str, Axes])
     """
 
-    design.solve()
+    template = FigureTemplate(design, solve=solve)
 
-    width = design.figure_width
-    height = design.figure_height
+    if not pyplot:
+        return template.make_figure(**kwargs)
 
-    fig = plt.figure(figsize=(width, height), **kwargs)
-    axes = dict()
+    import matplotlib.pyplot as plt
+    fig = plt.figure(figsize=template.figsize, **kwargs)
+    return fig, template.add_axes(fig)
 
-    for el in design.elements:
-        dimensions = [el._x/width, el._y/height, el._width/width, el._height/height]
-        axes[el.text] = fig.add_axes(dimensions, label=el.text)
 
-    return fig, axes
+def render_batch(layout, items, output, plot=None, processes=None, max_pending=None,
+                 savefig_kwargs=None, **kwargs):
+    """
+    Render one figure per item with a shared layout and save each to disk.
+
+    Every figure is built from a FigureTemplate with the object-oriented
+    matplotlib API, so no pyplot state is involved. With processes > 1, the
+    layout is sent to each worker process once and solved there once, and
+    at most max_pending items are rendered or waiting at any time, so that
+    items can be produced lazily (e.g., read from disk by a generator)
+    without holding the whole batch in memory.
+
+    With processes > 1, plot and the items must be picklable, e.g., plot
+    should be defined at the top level of a module.
+
+        def plot(fig, axes, data):
+            axes['left'].plot(data)
+
+        render_batch(design, datasets, 'figures/{index:04d}.pdf', plot=plot, processes=8)
+
+    :arg layout: Design or base64-encoded JSON string of a design
+    :arg items: iterable of data items passed to plot, or, if plot is None,
+                of callables item(fig, axes) that draw a figure
+    :arg output: format string for the output paths with an 'index' field,
+                 or a function that takes the index and returns the path
+    :arg plot: (default=None) function plot(fig, axes, item) that draws a figure
+    :arg processes: (default=None) number of worker processes, or None to
+                    render in this process
+    :arg max_pending: (default=None) maximum number of items submitted to the
+                      workers but not yet written, by default 4 per process
+    :arg savefig_kwargs: (default=None) keyword arguments for Figure.savefig()
+    :arg kwargs: additional keyword arguments for matplotlib Figure creation
+    :return: list of the output paths in the order of items
+    """
+    if isinstance(layout, Design):
+        layout = layout.get_json_string(compact=True)
+    else:
+        layout = base64.b64decode(layout).decode('utf-8')
+    if savefig_kwargs is None:
+        savefig_kwargs = dict()
+    if not callable(output):
+        pattern = output
+
+        def output(index):
+            return pattern.format(index=index)
+
+    initargs = (layout, plot, savefig_kwargs, kwargs)
+    paths = []
+
+    # in this process, the state is passed along so that concurrent or nested
+    # calls do not share a figure
+    if processes is None or processes <= 1:
+        state = _make_render_state(*initargs)
+        for index, item in enumerate(items):
+            paths.append(_render_item(output(index), item, state=state))
+        return paths
+
+    if max_pending is None:
+        max_pending = 4 * processes
+
+    from concurrent.futures import ProcessPoolExecutor
+
+    with ProcessPoolExecutor(max_workers=processes, initializer=_initialize_render_worker,
+                             initargs=initargs) as executor:
+        pending = deque()
+        for index, item in enumerate(items):
+            pending.append(executor.submit(_render_item, output(index), item))
+            if len(pending) >= max_pending:
+                paths.append(pending.popleft().result())
+        while pending:
+            paths.append(pending.popleft().result())
+    return paths
+
+
+def _make_render_state(layout, plot, savefig_kwargs, figure_kwargs):
+    design = Design()
+    design.from_json_string(layout)
+    template = FigureTemplate(design)
+    fig, _ = template.make_figure(**figure_kwargs)
+    return dict(template=template, figure=fig, plot=plot, savefig_kwargs=savefig_kwargs)
+
+
+# each render worker process builds its template once and reuses a single figure
+_render_state = None
+
+
+def _initialize_render_worker(layout, plot, savefig_kwargs, figure_kwargs):
+    global _render_state
+    _render_state = _make_render_state(layout, plot, savefig_kwargs, figure_kwargs)
+
+
+def _render_item(path, item, state=None):
+    if state is None:
+        state = _render_state
+    fig, axes = state['template'].make_figure(figure=state['figure'])
+    if state['plot'] is None:
+        item(fig, axes)
+    else:
+        state['plot'](fig, axes, item)
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    fig.savefig(path, **state['savefig_kwargs'])
+    return path
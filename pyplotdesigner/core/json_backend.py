@@ -0,0 +1,79 @@
+__copyright__ = """Copyright (C) 2025 George N. Wong"""
+__license__ = """
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in
+all copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+THE SOFTWARE.
+"""
+
+import json
+
+
+def _dumps_stdlib(obj):
+    return json.dumps(obj, indent=None, separators=(',', ':'))
+
+
+_encoder = _dumps_stdlib
+
+
+def _get_orjson_encoder():
+    import orjson
+
+    def _dumps_orjson(obj):
+        return orjson.dumps(obj, option=orjson.OPT_SERIALIZE_NUMPY).decode('utf-8')
+
+    return _dumps_orjson
+
+
+def set_json_encoder(encoder=None):
+    """
+    Choose the JSON encoder used by Design.get_json_string().
+
+    :arg encoder: (default=None) one of
+                  None or "json" - the standard library encoder
+                  "orjson" - orjson, which must be installed
+                  "auto" - orjson if it is installed, otherwise the standard library
+                  a callable that takes an object and returns a str or bytes
+
+    :raises: ImportError - "orjson" was requested but is not installed
+    """
+    global _encoder
+    if encoder is None or encoder == "json":
+        _encoder = _dumps_stdlib
+    elif encoder == "orjson":
+        _encoder = _get_orjson_encoder()
+    elif encoder == "auto":
+        try:
+            _encoder = _get_orjson_encoder()
+        except ImportError:
+            _encoder = _dumps_stdlib
+    elif callable(encoder):
+        _encoder = encoder
+    else:
+        raise ValueError(f"Unknown JSON encoder '{encoder}'")
+
+
+def dumps(obj):
+    """
+    Encode an object as compact JSON with the configured encoder.
+
+    :arg obj: JSON-serializable object
+    :return: JSON string
+    """
+    result = _encoder(obj)
+    if isinstance(result, bytes):
+        result = result.decode('utf-8')
+    return result
@@ -20,7 +20,9 @@ THE SOFTWARE.
 """
 
 
-import numpy as np
+def _isclose(a, b, rtol=1e-05, atol=1e-08):
+    # same tolerance as numpy.allclose, which is not needed for scalars
+    return abs(a - b) <= atol + rtol * abs(b)
 
 
 class Variable:
@@ -33,6 +35,38 @@ class Variable:
 
     def set(self, value):
         setattr(self.owner, self.attr, value)
+        self._notify()
+
+    def _notify(self):
+        # let the owning design know that this variable needs to be re-solved
+        design = getattr(self.owner, '_design', None)
+        if design is not None:
+            design._mark_dirty(self)
+
+    def get_coefficients(self):
+        """
+        Return the canonical linear form of this variable as a mapping from
+        base attributes of the owner to their coefficients.
+        """
+        return {self.attr: 1.0}
+
+    def get_solve_attribute(self):
+        """
+        Return the base attribute of the owner that is modified by set().
+        """
+        return self.attr
+
+    def get_read_slots(self):
+        """
+        Return the (id(owner), attr) storage slots that determine this value.
+        """
+        return ((id(self.owner), self.attr),)
+
+    def get_write_slots(self):
+        """
+        Return the (id(owner), attr) storage slots modified by set().
+        """
+        return ((id(self.owner), self.attr),)
 
     def to_dict(self):
         d = dict(id=None, attr=None)
@@ -44,6 +78,15 @@ class Variable:
         d['attr'] = self.attr[1:]
         return d
 
+    def to_reference(self):
+        """
+        Return the compact reference to this variable, [id] for constants or
+        [id, attr] for element attributes.
+        """
+        if isinstance(self.owner, Constant):
+            return [self.owner.id]
+        return [self.owner.id, self.attr[1:]]
+
     def __hash__(self):
         return hash((id(self.owner), self.attr))
 
@@ -57,17 +100,41 @@ class Variable:
 
 
 class ComputedVariable(Variable):
-    def __init__(self, owner, attr, get_fn, set_fn, label=None):
+    """
+    A variable defined as a linear combination of base attributes of its owner,
+    e.g., right = x + width. Setting the variable solves for a single base
+    attribute (solve_for) while holding the other terms fixed.
+    """
+
+    def __init__(self, owner, attr, coefficients, solve_for, label=None):
         super().__init__(owner=owner, attr=attr)
-        self._get_fn = get_fn
-        self._set_fn = set_fn
+        self.coefficients = dict(coefficients)
+        self.solve_for = solve_for
         self.label = label or "computed"
 
     def get(self):
-        return self._get_fn()
+        owner = self.owner
+        return sum(coef * getattr(owner, attr) for attr, coef in self.coefficients.items())
 
     def set(self, value):
-        self._set_fn(value)
+        owner = self.owner
+        rest = sum(coef * getattr(owner, attr) for attr, coef in self.coefficients.items()
+                   if attr != self.solve_for)
+        setattr(owner, self.solve_for, (value - rest) / self.coefficients[self.solve_for])
+        self._notify()
+
+    def get_coefficients(self):
+        return self.coefficients
+
+    def get_solve_attribute(self):
+        return self.solve_for
+
+    def get_read_slots(self):
+        owner = id(self.owner)
+        return tuple((owner, attr) for attr in self.coefficients)
+
+    def get_write_slots(self):
+        return ((id(self.owner), self.solve_for),)
 
     def to_dict(self):
         return {"id": self.owner.id, "attr": self.attr[1:]}
@@ -81,6 +148,7 @@ class Constant:
         self.id = id
         self._value = value
         self.value = Variable(self, "_value")
+        self._design = None
 
     def __repr__(self):
         return f"Constant(id={self.id}, value={self._value})"
@@ -102,6 +170,15 @@ class Constant:
 
 
 class Element:
+
+    # canonical linear forms of computed attributes as (coefficients, solve_for)
+    COMPUTED_ATTRIBUTES = {
+        'right': ({'_x': 1.0, '_width': 1.0}, '_x'),
+        'top': ({'_y': 1.0, '_height': 1.0}, '_y'),
+        'center_x': ({'_x': 1.0, '_width': 0.5}, '_x'),
+        'center_y': ({'_y': 1.0, '_height': 0.5}, '_y'),
+    }
+
     def __init__(self, id, x, y, width, height, type, text=""):
         self.id = id
         self._x = x
@@ -110,6 +187,7 @@ class Element:
         self._height = height
         self.type = type
         self.text = text
+        self._design = None
 
         # expose symbolic refs
         self.x = Variable(self, "_x")
@@ -122,41 +200,18 @@ class Element:
         self.left = self.x
 
         # add computed variables
-        self.right = ComputedVariable(
-            owner=self,
-            attr="_right",
-            get_fn=lambda: self._x + self._width,
-            set_fn=lambda val: setattr(self, "_x", val - self._width)
-        )
-
-        self.top = ComputedVariable(
-            owner=self,
-            attr="_top",
-            get_fn=lambda: self._y + self._height,
-            set_fn=lambda val: setattr(self, "_y", val - self._height)
-        )
-
-        self.center_x = ComputedVariable(
-            owner=self,
-            attr="_center_x",
-            get_fn=lambda: self._x + self._width / 2,
-            set_fn=lambda val: setattr(self, "_x", val - self._width / 2)
-        )
-
-        self.center_y = ComputedVariable(
-            owner=self,
-            attr="_center_y",
-            get_fn=lambda: self._y + self._height / 2,
-            set_fn=lambda val: setattr(self, "_y", val - self._height / 2)
-        )
+        for name, (coefficients, solve_for) in self.COMPUTED_ATTRIBUTES.items():
+            setattr(self, name, ComputedVariable(owner=self, attr=f"_{name}",
+                                                 coefficients=coefficients,
+                                                 solve_for=solve_for))
 
     def __eq__(self, other):
         if not isinstance(other, Element):
             return False
-        return np.allclose(self._x, other._x) and \
-            np.allclose(self._y, other._y) and \
-            np.allclose(self._width, other._width) and \
-            np.allclose(self._height, other._height) and \
+        return _isclose(self._x, other._x) and \
+            _isclose(self._y, other._y) and \
+            _isclose(self._width, other._width) and \
+            _isclose(self._height, other._height) and \
             self.type == other.type and \
             self.text == other.text
 
@@ -192,6 +247,7 @@ class SetValueConstraint:
         self.add_before = add_before
         self.add_after = add_after
         self._multiply = multiply
+        self._design = None
 
     def set_attribute(self, attribute, value):
         if attribute == 'source':
@@ -202,6 +258,8 @@ class SetValueConstraint:
             self.add_before = value
         elif attribute == 'add_after':
             self.add_after = value
+        if self._design is not None:
+            self._design._mark_constraint_dirty(self)
 
     def _resolve(self, value_or_var):
         return value_or_var.get() if hasattr(value_or_var, 'get') else value_or_var
@@ -271,6 +329,24 @@ class SetValueConstraint:
         return hash((self.target, self.source, self.multiply,
                      self.add_before, self.add_after))
 
+    def to_compact_dict(self):
+        """
+        Return a dictionary representation that omits fields with default
+        values and refers to variables with to_reference().
+        """
+        d = {'target': self.target.to_reference()}
+        for field, default in (('source', None), ('multiply', 1),
+                               ('add_before', 0), ('add_after', 0)):
+            value = getattr(self, field)
+            if isinstance(value, Variable):
+                d[field] = value.to_reference()
+            elif value is None:
+                if default is not None:
+                    d[field] = None
+            elif value != default:
+                d[field] = value
+        return d
+
     def to_dict(self):
         d = {}
         d['target'] = self._get_dict_for_attribute(self.target)
@@ -0,0 +1,293 @@
+__copyright__ = """Copyright (C) 2025 George N. Wong"""
+__license__ = """
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in
+all copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+THE SOFTWARE.
+"""
+
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from .models import Variable
+from .solver import ConstraintGraph
+
+
+OPERAND_FIELDS = ('source', 'add_before', 'multiply', 'add_after')
+
+
+class SolvePlan:
+    """
+    A compiled form of a Design's constraints that can be evaluated with
+    NumPy instead of calling SetValueConstraint.apply() for each constraint.
+
+    All element attributes and constants are mapped onto a flat value vector
+    with layout [x0, y0, width0, height0, x1, ..., constant0, ..., 0], where
+    the final entry is always zero. Constraints are grouped into levels such
+    that the constraints on one level are independent of each other. Every
+    operand of a constraint is stored as the linear form
+
+        c1 * values[i1] + c2 * values[i2] + b
+
+    which covers numbers, constants, base attributes, and computed attributes
+    like 'right' or 'center_x'. A level is then evaluated with one gather,
+    the affine update (source + add_before) * multiply + add_after, and one
+    scatter into the attribute that the target solves for.
+
+    The plan holds no references to the Design it was compiled from. The
+    element geometry and constant values at compile time are kept as base
+    values, so the plan can be re-solved for new constant values with solve()
+    and solve_batch() without touching any Element objects.
+    """
+
+    def __init__(self, design, graph=None):
+        """
+        Compile the constraints of a design.
+
+        :arg design: Design instance to compile
+        :arg graph: (default=None) ConstraintGraph of the design's constraints
+                    to reuse, otherwise one is built
+
+        :raises: RuntimeError - circular or unsatisfiable constraint detected
+        :raises: ValueError - constraint references a variable outside the design
+        """
+        self.n_elements = len(design.elements)
+        self.element_ids = [element.id for element in design.elements]
+        self.constant_ids = [constant.id for constant in design.constants]
+        self._constant_index = {}
+        for index, constant_id in enumerate(self.constant_ids):
+            self._constant_index.setdefault(constant_id, 4 * self.n_elements + index)
+        self.n_values = 4 * self.n_elements + len(self.constant_ids) + 1
+        self.zero = self.n_values - 1
+
+        self._slots = {}
+        for index, element in enumerate(design.elements):
+            for column, attr in enumerate(('_x', '_y', '_width', '_height')):
+                self._slots[(id(element), attr)] = 4 * index + column
+        for index, constant in enumerate(design.constants):
+            self._slots[(id(constant), '_value')] = 4 * self.n_elements + index
+
+        if graph is None:
+            graph = ConstraintGraph(design.constraints)
+        order = graph.order()
+
+        # assign each constraint to the first level after its inputs were
+        # written and after any earlier constraint writing the same slot;
+        # order() puts writers of the same slot in registration order, so the
+        # last registered one also wins here
+        levels = []
+        slot_levels = {}
+        for constraint in order:
+            reads, writes = graph.get_slots(constraint)
+            level = 0
+            for slot in reads | writes:
+                if slot in slot_levels:
+                    level = max(level, slot_levels[slot] + 1)
+            for slot in writes:
+                slot_levels[slot] = level
+            if level == len(levels):
+                levels.append([])
+            levels[level].append(constraint)
+
+        self.levels = [self._compile_level(level) for level in levels]
+        self.n_constraints = len(order)
+        self.base_values = self.get_values(design)
+
+        # only needed while compiling
+        del self._slots
+
+    def _get_slot(self, variable):
+        try:
+            return self._slots[(id(variable.owner), variable.get_solve_attribute())]
+        except KeyError:
+            raise ValueError(f"Variable {variable} is not part of the design")
+
+    def _get_linear_form(self, value):
+        if value is None:
+            return (self.zero, 0., self.zero, 0., 0.)
+        if not isinstance(value, Variable):
+            return (self.zero, 0., self.zero, 0., float(value))
+        terms = []
+        for attr, coef in value.get_coefficients().items():
+            key = (id(value.owner), attr)
+            if key not in self._slots:
+                raise ValueError(f"Variable {value} is not part of the design")
+            terms.append((self._slots[key], coef))
+        if len(terms) > 2:
+            raise ValueError(f"Variable {value} depends on more than two attributes")
+        terms += [(self.zero, 0.)] * (2 - len(terms))
+        return (terms[0][0], terms[0][1], terms[1][0], terms[1][1], 0.)
+
+    def _compile_level(self, constraints):
+        operands = np.array([[self._get_linear_form(getattr(c, field))
+                              for c in constraints] for field in OPERAND_FIELDS])
+
+        # target = c_t * values[t] + c_o * values[o], solved for values[t]
+        targets = []
+        for constraint in constraints:
+            target = constraint.target
+            solve_for = self._get_slot(target)
+            coefficients = target.get_coefficients()
+            other, other_coef = self.zero, 0.
+            for attr, coef in coefficients.items():
+                if attr != target.get_solve_attribute():
+                    other = self._slots[(id(target.owner), attr)]
+                    other_coef = coef
+            targets.append((solve_for, coefficients[target.get_solve_attribute()],
+                            other, other_coef))
+        targets = np.array(targets)
+
+        return dict(
+            i1=operands[:, :, 0].astype(np.intp),
+            c1=operands[:, :, 1],
+            i2=operands[:, :, 2].astype(np.intp),
+            c2=operands[:, :, 3],
+            b=operands[:, :, 4],
+            target=targets[:, 0].astype(np.intp),
+            target_coef=targets[:, 1],
+            other=targets[:, 2].astype(np.intp),
+            other_coef=targets[:, 3]
+        )
+
+    def get_values(self, design):
+        """
+        Gather the current element geometry and constant values of a design
+        into a value vector.
+
+        :arg design: Design instance that this plan was compiled from
+        :return: 1d NumPy array of length n_values
+        """
+        values = np.zeros(self.n_values)
+        values[:4 * self.n_elements] = design.get_geometry_array().ravel()
+        values[4 * self.n_elements:self.zero] = [c._value for c in design.constants]
+        return values
+
+    def set_values(self, design, values):
+        """
+        Scatter a solved value vector back onto the elements and constants of
+        a design without marking them as changed.
+
+        :arg design: Design instance that this plan was compiled from
+        :arg values: 1d value vector, e.g., from evaluate()
+        """
+        geometry = values[:4 * self.n_elements].reshape(-1, 4)
+        if design._store is not None:
+            design._store.data[:] = geometry
+        else:
+            for el, (x, y, width, height) in zip(design.elements, geometry.tolist()):
+                el._x, el._y, el._width, el._height = x, y, width, height
+        for constant, value in zip(design.constants, values[4 * self.n_elements:].tolist()):
+            constant._value = value
+
+    def evaluate(self, values):
+        """
+        Apply every constraint, level by level, to a value vector in place.
+
+        :arg values: array of shape (..., n_values), e.g., from get_values();
+                     leading dimensions are solved independently
+        :return: the updated values array
+        """
+        for level in self.levels:
+            operands = values[..., level['i1']] * level['c1'] + \
+                values[..., level['i2']] * level['c2'] + level['b']
+            source, add_before, multiply, add_after = \
+                (operands[..., i, :] for i in range(len(OPERAND_FIELDS)))
+            result = (source + add_before) * multiply + add_after
+            result = (result - values[..., level['other']] * level['other_coef']) / \
+                level['target_coef']
+            values[..., level['target']] = result
+        return values
+
+    def _get_constant_indices(self, constant_ids):
+        indices = []
+        for constant_id in constant_ids:
+            if constant_id not in self._constant_index:
+                raise ValueError(f"Constant with ID '{constant_id}' not found")
+            indices.append(self._constant_index[constant_id])
+        return indices
+
+    def solve(self, constants=None):
+        """
+        Solve the plan for a set of constant values.
+
+        :arg constants: (default=None) dict mapping constant IDs to values;
+                        constants that are not given keep their compiled value
+        :return: (n_elements, 4) array of x, y, width, height per element
+        """
+        values = self.base_values.copy()
+        if constants:
+            indices = self._get_constant_indices(constants.keys())
+            values[indices] = list(constants.values())
+        self.evaluate(values)
+        return values[:4 * self.n_elements].reshape(self.n_elements, 4)
+
+    def solve_batch(self, constant_values, constant_ids=None, processes=None,
+                    chunksize=None):
+        """
+        Solve the plan for many sets of constant values at once.
+
+        :arg constant_values: (N, k) array with one row per scenario
+        :arg constant_ids: (default=None) IDs of the k constants in column
+                           order, or None to use all constants in plan order
+        :arg processes: (default=None) if greater than one, split the scenarios
+                        into chunks that are solved in a pool of this many
+                        worker processes
+        :arg chunksize: (default=None) number of scenarios per chunk when using
+                        processes, by default about four chunks per process
+        :return: (N, n_elements, 4) array of x, y, width, height per element
+        """
+        if constant_ids is None:
+            constant_ids = self.constant_ids
+        indices = self._get_constant_indices(constant_ids)
+
+        constant_values = np.asarray(constant_values, dtype=float)
+        if constant_values.ndim != 2 or constant_values.shape[1] != len(indices):
+            raise ValueError(f"Expected constant values of shape (N, {len(indices)}), "
+                             f"got {constant_values.shape}")
+
+        if processes is not None and processes > 1 and len(constant_values) > 1:
+            return self._solve_batch_parallel(constant_values, constant_ids,
+                                              processes, chunksize)
+
+        values = np.tile(self.base_values, (len(constant_values), 1))
+        values[:, indices] = constant_values
+        self.evaluate(values)
+        return values[:, :4 * self.n_elements].reshape(-1, self.n_elements, 4)
+
+    def _solve_batch_parallel(self, constant_values, constant_ids, processes, chunksize):
+        if chunksize is None:
+            chunksize = -(-len(constant_values) // (4 * processes))
+        chunks = [(constant_values[start:start+chunksize], constant_ids)
+                  for start in range(0, len(constant_values), chunksize)]
+        with ProcessPoolExecutor(max_workers=processes, initializer=_initialize_worker,
+                                 initargs=(self,)) as executor:
+            results = list(executor.map(_solve_batch_chunk, chunks))
+        return np.concatenate(results)
+
+
+# each worker process receives the plan once, when it is started
+_worker_plan = None
+
+
+def _initialize_worker(plan):
+    global _worker_plan
+    _worker_plan = plan
+
+
+def _solve_batch_chunk(chunk):
+    constant_values, constant_ids = chunk
+    return _worker_plan.solve_batch(constant_values, constant_ids=constant_ids)
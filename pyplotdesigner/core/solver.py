@@ -0,0 +1,252 @@
+__copyright__ = """Copyright (C) 2025 George N. Wong"""
+__license__ = """
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in
+all copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+THE SOFTWARE.
+"""
+
+import heapq
+
+from .models import Variable
+
+
+INPUT_FIELDS = ('source', 'multiply', 'add_before', 'add_after')
+
+
+def get_read_slots(constraint):
+    """
+    Return the set of storage slots that a constraint reads when applied.
+
+    Slots are (id(owner), attr) pairs that identify the underlying storage of
+    element attributes and constants. Computed variables expand to the base
+    slots they are derived from, and a computed target contributes the slots
+    that it reads but does not overwrite (e.g., setting 'right' reads 'width').
+
+    :arg constraint: SetValueConstraint to inspect
+    :return: set of slots
+    """
+    slots = set()
+    for field in INPUT_FIELDS:
+        value = getattr(constraint, field, None)
+        if isinstance(value, Variable):
+            slots.update(value.get_read_slots())
+    target = constraint.target
+    target_reads = target.get_read_slots()
+    target_writes = target.get_write_slots()
+    # plain attributes read nothing beyond what they overwrite
+    if target_reads != target_writes:
+        slots.update(set(target_reads) - set(target_writes))
+    return slots
+
+
+def get_write_slots(constraint):
+    """
+    Return the set of storage slots that a constraint writes when applied.
+
+    :arg constraint: SetValueConstraint to inspect
+    :return: set of slots
+    """
+    return set(constraint.target.get_write_slots())
+
+
+class ConstraintGraph:
+    """
+    Dependency graph between constraints, linked through the storage slots
+    that each constraint reads and writes.
+
+    The graph is maintained incrementally as constraints are added, removed,
+    or modified, so that the set of constraints affected by a change (the
+    downstream cone) can be found without rescanning every constraint.
+    Constraints are tracked by identity.
+    """
+
+    def __init__(self, constraints=()):
+        """
+        Initialize a dependency graph, optionally from a list of constraints.
+
+        :arg constraints: (default=()) constraints to register in order
+        """
+        self._constraints = {}
+        self._sequence = {}
+        self._reads = {}
+        self._writes = {}
+        self._readers = {}
+        self._writers = {}
+        self._counter = 0
+        for constraint in constraints:
+            self.add(constraint)
+
+    def __len__(self):
+        return len(self._constraints)
+
+    def __contains__(self, constraint):
+        return id(constraint) in self._constraints
+
+    def add(self, constraint):
+        """
+        Register a constraint after all currently registered constraints.
+
+        :arg constraint: SetValueConstraint to add
+        """
+        key = id(constraint)
+        if key in self._constraints:
+            self._unlink(key)
+        self._sequence[key] = self._counter
+        self._counter += 1
+        self._link(constraint)
+
+    def remove(self, constraint):
+        """
+        Remove a constraint from the graph if it is registered.
+
+        :arg constraint: SetValueConstraint to remove
+        """
+        key = id(constraint)
+        if key in self._constraints:
+            self._unlink(key)
+            del self._sequence[key]
+
+    def update(self, constraint):
+        """
+        Recompute the read/write slots of a constraint after one of its
+        attributes has changed, keeping its registration order.
+
+        :arg constraint: SetValueConstraint that was modified
+        """
+        key = id(constraint)
+        if key not in self._constraints:
+            self.add(constraint)
+            return
+        self._unlink(key)
+        self._link(constraint)
+
+    def get_slots(self, constraint):
+        """
+        Get the cached read and write slots of a registered constraint.
+
+        :arg constraint: registered SetValueConstraint
+        :return: (set of read slots, set of write slots)
+        """
+        key = id(constraint)
+        return self._reads[key], self._writes[key]
+
+    def _link(self, constraint):
+        key = id(constraint)
+        reads = get_read_slots(constraint)
+        writes = get_write_slots(constraint)
+        self._constraints[key] = constraint
+        self._reads[key] = reads
+        self._writes[key] = writes
+        for slot in reads:
+            self._readers.setdefault(slot, set()).add(key)
+        for slot in writes:
+            self._writers.setdefault(slot, set()).add(key)
+
+    def _unlink(self, key):
+        for slot in self._reads.pop(key):
+            self._readers[slot].discard(key)
+            if not self._readers[slot]:
+                del self._readers[slot]
+        for slot in self._writes.pop(key):
+            self._writers[slot].discard(key)
+            if not self._writers[slot]:
+                del self._writers[slot]
+        del self._constraints[key]
+
+    def get_downstream(self, constraints=(), slots=()):
+        """
+        Return the constraints that must be re-applied after the given
+        constraints were modified and/or the given slots were set.
+
+        The cone includes every constraint that reads or writes a changed
+        slot, and is closed under "writes a slot that another constraint
+        reads or writes".
+
+        :arg constraints: (default=()) modified constraints
+        :arg slots: (default=()) storage slots that were set externally
+
+        :return: set of constraint keys, to be passed to order()
+        """
+        stack = [id(c) for c in constraints if id(c) in self._constraints]
+        for slot in slots:
+            stack.extend(self._readers.get(slot, ()))
+            stack.extend(self._writers.get(slot, ()))
+
+        cone = set()
+        while stack:
+            key = stack.pop()
+            if key in cone:
+                continue
+            cone.add(key)
+            for slot in self._writes[key]:
+                stack.extend(self._readers.get(slot, ()))
+                stack.extend(self._writers.get(slot, ()))
+        return cone
+
+    def order(self, keys=None):
+        """
+        Order constraints so that each one is applied only after every
+        constraint that writes one of its inputs, using Kahn's algorithm.
+        Constraints that write the same slot are applied in registration
+        order, so the last registered one wins regardless of which subset is
+        ordered. Independent constraints keep their relative registration
+        order.
+
+        :arg keys: (default=None) subset of constraint keys to order, e.g.,
+                   from get_downstream(), or None for all constraints
+
+        :return: list of constraints in a valid evaluation order
+
+        :raises: RuntimeError - circular or unsatisfiable constraint detected
+        """
+        if keys is None:
+            keys = self._constraints.keys()
+        keys = set(keys)
+
+        dependents = {key: [] for key in keys}
+        in_degree = {}
+        for key in keys:
+            parents = set()
+            for slot in self._reads[key]:
+                parents.update(self._writers.get(slot, ()))
+            # write-after-write conflicts resolve in registration order
+            sequence = self._sequence[key]
+            for slot in self._writes[key]:
+                parents.update(other for other in self._writers[slot]
+                               if self._sequence[other] < sequence)
+            parents &= keys
+            for parent in parents:
+                dependents[parent].append(key)
+            in_degree[key] = len(parents)
+
+        ready = [(self._sequence[key], key) for key, degree in in_degree.items()
+                 if degree == 0]
+        heapq.heapify(ready)
+
+        order = []
+        while ready:
+            _, key = heapq.heappop(ready)
+            order.append(self._constraints[key])
+            for child in dependents[key]:
+                in_degree[child] -= 1
+                if in_degree[child] == 0:
+                    heapq.heappush(ready, (self._sequence[child], child))
+
+        if len(order) < len(keys):
+            raise RuntimeError("Circular or unsatisfiable constraint detected")
+
+        return order
@@ -0,0 +1,144 @@
+__copyright__ = """Copyright (C) 2025 George N. Wong"""
+__license__ = """
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in
+all copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+THE SOFTWARE.
+"""
+
+import numpy as np
+
+from .models import Variable, ComputedVariable, Element
+
+
+GEOMETRY_ATTRIBUTES = ('_x', '_y', '_width', '_height')
+
+
+class GeometryStore:
+    """
+    Contiguous storage for element geometry. Each row holds the x, y, width,
+    and height of one element, in the order that elements were added.
+    """
+
+    def __init__(self, capacity=64):
+        """
+        Initialize an empty store.
+
+        :arg capacity: (default=64) number of rows to preallocate
+        """
+        self._data = np.zeros((max(capacity, 1), 4))
+        self._size = 0
+
+    def __len__(self):
+        return self._size
+
+    @property
+    def data(self):
+        """
+        View of the (n, 4) geometry array for the stored elements.
+        """
+        return self._data[:self._size]
+
+    def append(self, x, y, width, height):
+        """
+        Append a row, growing the underlying buffer if necessary.
+
+        :return: row index of the new entry
+        """
+        if self._size == len(self._data):
+            data = np.zeros((2 * len(self._data), 4))
+            data[:self._size] = self._data[:self._size]
+            self._data = data
+        self._data[self._size] = (x, y, width, height)
+        self._size += 1
+        return self._size - 1
+
+    def remove(self, index):
+        """
+        Remove a row, shifting all subsequent rows up by one.
+
+        :arg index: row index to remove
+        """
+        self._data[index:self._size-1] = self._data[index+1:self._size]
+        self._size -= 1
+
+
+def _slot_property(column):
+    def get(self):
+        if self._store is None:
+            return self._detached[column]
+        return float(self._store._data[self._index, column])
+
+    def set(self, value):
+        if self._store is None:
+            self._detached[column] = value
+        else:
+            self._store._data[self._index, column] = value
+
+    return property(get, set)
+
+
+def _variable_property(attr):
+    return property(lambda self: Variable(self, attr))
+
+
+def _computed_property(name):
+    coefficients, solve_for = Element.COMPUTED_ATTRIBUTES[name]
+    return property(lambda self: ComputedVariable(owner=self, attr=f"_{name}",
+                                                  coefficients=coefficients,
+                                                  solve_for=solve_for))
+
+
+class ArrayElement(Element):
+    """
+    An Element whose geometry lives in a row of a GeometryStore. Variables
+    are created on access as thin views onto that row, so the element itself
+    only holds its identifying fields and row index.
+    """
+
+    _x = _slot_property(0)
+    _y = _slot_property(1)
+    _width = _slot_property(2)
+    _height = _slot_property(3)
+
+    x = left = _variable_property('_x')
+    y = bottom = _variable_property('_y')
+    width = _variable_property('_width')
+    height = _variable_property('_height')
+
+    right = _computed_property('right')
+    top = _computed_property('top')
+    center_x = _computed_property('center_x')
+    center_y = _computed_property('center_y')
+
+    def __init__(self, store, id, x, y, width, height, type, text=""):
+        self.id = id
+        self.type = type
+        self.text = text
+        self._design = None
+        self._store = store
+        self._index = store.append(x, y, width, height)
+        self._detached = None
+
+    def detach(self):
+        """
+        Copy the geometry out of the store into the element itself, e.g.,
+        before its row is removed, so that the element no longer refers to a
+        row that may be reused by another element.
+        """
+        self._detached = [float(value) for value in self._store._data[self._index]]
+        self._store = None
+        self._index = None
@@ -0,0 +1,207 @@
+__copyright__ = """Copyright (C) 2025 George N. Wong"""
+__license__ = """
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in
+all copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+THE SOFTWARE.
+"""
+
+import base64
+import binascii
+import codecs
+import json
+
+# characters that can continue a number, where '' is the end of the buffer
+NUMBER_CHARACTERS = '0123456789+-.eE'
+
+# yielded by iter_sections(announce=True) when a top-level array starts
+SECTION_START = object()
+
+
+class JSONStream:
+    """
+    Minimal incremental reader for a JSON document that arrives as a sequence
+    of text chunks. Only the structure that is navigated explicitly (objects
+    and arrays via expect()/peek()) is tracked; every other value is decoded
+    in one piece with json.JSONDecoder.raw_decode, so only one value needs to
+    be held in memory at a time.
+    """
+
+    def __init__(self, chunks):
+        """
+        :arg chunks: iterable of str chunks that concatenate to the document
+        """
+        self._chunks = iter(chunks)
+        self._buffer = ''
+        self._pos = 0
+        self._eof = False
+        self._decoder = json.JSONDecoder()
+
+    def _fill(self):
+        chunk = next(self._chunks, None)
+        if chunk is None:
+            self._eof = True
+            return False
+        self._buffer = self._buffer[self._pos:] + chunk
+        self._pos = 0
+        return True
+
+    def peek(self):
+        """
+        Skip whitespace and return the next character without consuming it.
+
+        :return: next character, or '' at the end of the document
+        """
+        while True:
+            while self._pos < len(self._buffer) and self._buffer[self._pos] in ' \t\r\n':
+                self._pos += 1
+            if self._pos < len(self._buffer):
+                return self._buffer[self._pos]
+            if not self._fill():
+                return ''
+
+    def expect(self, chars):
+        """
+        Consume the next non-whitespace character, which must be one of chars.
+
+        :arg chars: string of acceptable characters
+        :return: the consumed character
+
+        :raises: ValueError - unexpected character or end of document
+        """
+        char = self.peek()
+        if not char or char not in chars:
+            raise ValueError(f"Expected one of '{chars}' but found '{char}' in JSON stream")
+        self._pos += 1
+        return char
+
+    def read_value(self):
+        """
+        Decode the next complete JSON value.
+
+        :return: decoded value
+
+        :raises: ValueError - malformed JSON
+        """
+        self.peek()
+        while True:
+            try:
+                value, end = self._decoder.raw_decode(self._buffer, self._pos)
+            except json.JSONDecodeError:
+                if not self._fill():
+                    raise
+                continue
+            # a number may continue in the next chunk, e.g., after '1.' or '1e'
+            if _is_number(value) and self._buffer[end:end+1] in NUMBER_CHARACTERS and \
+                    not self._eof and self._fill():
+                continue
+            self._pos = end
+            return value
+
+
+def _is_number(value):
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+def iter_sections(chunks, announce=False):
+    """
+    Iterate over the top-level entries of a JSON object. Array values are
+    yielded one item at a time, other values are yielded whole.
+
+    :arg chunks: iterable of str chunks that concatenate to the document
+    :arg announce: (default=False) whether to yield (key, SECTION_START)
+                   before the items of each array, so that empty arrays are
+                   seen as well
+    :return: generator of (key, value) pairs, e.g., ('elements', {...})
+    """
+    stream = JSONStream(chunks)
+    stream.expect('{')
+    if stream.peek() == '}':
+        return
+    while True:
+        key = stream.read_value()
+        stream.expect(':')
+        if stream.peek() == '[':
+            if announce:
+                yield key, SECTION_START
+            stream.expect('[')
+            if stream.peek() == ']':
+                stream.expect(']')
+            else:
+                while True:
+                    yield key, stream.read_value()
+                    if stream.expect(',]') == ']':
+                        break
+        else:
+            yield key, stream.read_value()
+        if stream.expect(',}') == '}':
+            return
+
+
+def iter_text_chunks(fp, chunk_size=1 << 20):
+    """
+    Read a design file as text chunks, transparently decoding base64 (as
+    written by Design.get_b64_string) in chunks when the content does not
+    start with a JSON object.
+
+    :arg fp: binary or text file-like object
+    :arg chunk_size: (default=1MiB) number of bytes or characters per read
+    :return: generator of str chunks
+    """
+    utf8 = codecs.getincrementaldecoder('utf-8')()
+
+    def _read():
+        while True:
+            chunk = fp.read(chunk_size)
+            if not chunk:
+                return
+            yield chunk.encode('utf-8') if isinstance(chunk, str) else chunk
+
+    raw = _read()
+    head = b''
+    for chunk in raw:
+        head += chunk
+        if head.strip():
+            break
+
+    if head.lstrip()[:1] == b'{':
+        for chunk in _chain(head, raw):
+            text = utf8.decode(chunk)
+            if text:
+                yield text
+        yield utf8.decode(b'', final=True)
+        return
+
+    pending = b''
+    for chunk in _chain(head, raw):
+        pending += b''.join(chunk.split())
+        usable = len(pending) - len(pending) % 4
+        if usable:
+            try:
+                text = utf8.decode(base64.b64decode(pending[:usable], validate=True))
+            except binascii.Error as error:
+                raise ValueError(f"Invalid base64 design data: {error}")
+            pending = pending[usable:]
+            if text:
+                yield text
+    if pending:
+        raise ValueError("Invalid base64 design data: truncated input")
+    yield utf8.decode(b'', final=True)
+
+
+def _chain(first, rest):
+    yield first
+    yield from rest
@@ -0,0 +1,94 @@
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+
+
+def get_canonical_hash(obj):
+    """
+    Hash a JSON-serializable object independently of dict key order.
+
+    :arg obj: JSON-serializable object
+    :return: hex string
+    """
+    encoded = json.dumps(obj, sort_keys=True, separators=(',', ':')).encode('utf-8')
+    return hashlib.blake2b(encoded, digest_size=16).hexdigest()
+
+
+class ResponseCache:
+    """
+    Thread-safe LRU cache of encoded responses, bounded both by the number of
+    entries and by the total size of the stored bodies.
+    """
+
+    def __init__(self, max_entries=256, max_bytes=64 << 20):
+        """
+        :arg max_entries: (default=256) maximum number of cached responses
+        :arg max_bytes: (default=64 MiB) maximum total size of cached bodies;
+                        larger bodies are never cached
+        """
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.nbytes = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key):
+        """
+        Look up a response and mark it as recently used.
+
+        :arg key: cache key, e.g., from get_canonical_hash()
+        :return: (status_code, body) or None if not cached
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry
+
+    def put(self, key, status_code, body):
+        """
+        Store a response, evicting the least recently used ones as needed.
+
+        :arg key: cache key
+        :arg status_code: HTTP status code of the response
+        :arg body: encoded response body as bytes
+        """
+        size = len(body)
+        if size > self.max_bytes or self.max_entries < 1:
+            return
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self.nbytes -= len(previous[1])
+            self._entries[key] = (status_code, body)
+            self.nbytes += size
+            while len(self._entries) > self.max_entries or self.nbytes > self.max_bytes:
+                _, (_, evicted) = self._entries.popitem(last=False)
+                self.nbytes -= len(evicted)
+                self.evictions += 1
+
+    def clear(self):
+        """
+        Remove all entries, keeping the counters.
+        """
+        with self._lock:
+            self._entries.clear()
+            self.nbytes = 0
+
+    def get_stats(self):
+        """
+        :return: dict with entries, bytes, hits, misses, and evictions
+        """
+        with self._lock:
+            return {'entries': len(self._entries), 'bytes': self.nbytes, 'hits': self.hits,
+                    'misses': self.misses, 'evictions': self.evictions}
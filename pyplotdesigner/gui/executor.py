@@ -0,0 +1,114 @@
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+
+class SupersededError(Exception):
+    """
+    Raised for a request that was replaced by a newer one with the same key.
+    """
+
+
+class ExecutorBusyError(Exception):
+    """
+    Raised when the maximum number of pending requests has been reached.
+    """
+
+
+class SolveExecutor:
+    """
+    Runs CPU-bound handlers in a bounded thread pool so that the event loop
+    stays free to serve other clients and static files.
+
+    Requests can carry a key, e.g., a client or session ID. A newer request
+    with the same key supersedes the older one: it is cancelled if it has not
+    started yet, or its result is discarded once it finishes. At most
+    max_pending requests are queued or running at the same time; beyond that
+    new requests are rejected instead of piling up behind each other.
+    """
+
+    def __init__(self, max_workers=4, max_pending=32, timeout=30.):
+        """
+        :arg max_workers: (default=4) number of worker threads
+        :arg max_pending: (default=32) maximum number of queued or running requests
+        :arg timeout: (default=30.) seconds to wait for a result, or None
+        """
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self.timeout = timeout
+        self._pool = ThreadPoolExecutor(max_workers=max_workers,
+                                        thread_name_prefix='pyplotdesigner-solve')
+        self._lock = threading.Lock()
+        self._pending = 0
+        self._latest = {}
+        self._superseded = set()
+
+    @property
+    def pending(self):
+        """
+        Number of requests that are queued or running.
+        """
+        return self._pending
+
+    def _release(self, future):
+        with self._lock:
+            self._pending -= 1
+
+    async def run(self, func, *args, key=None, timeout=False):
+        """
+        Run func(*args) in the pool and wait for its result.
+
+        :arg func: function to call
+        :arg key: (default=None) requests with equal keys supersede each other
+        :arg timeout: (default=self.timeout) seconds to wait, or None to wait
+                      indefinitely
+        :return: return value of func
+
+        :raises: SupersededError - a newer request with the same key was made
+        :raises: ExecutorBusyError - too many requests are pending
+        :raises: asyncio.TimeoutError - the result took longer than timeout
+        """
+        if timeout is False:
+            timeout = self.timeout
+
+        # cancelling a superseded request that has not started frees its slot
+        previous = self._latest.get(key, None) if key is not None else None
+        if previous is not None and not previous.done():
+            self._superseded.add(previous)
+            if not previous.cancel():
+                self._superseded.discard(previous)
+
+        # a running request is only superseded once the new one is accepted, so
+        # that a rejected request does not discard the previous one as well
+        with self._lock:
+            if self._pending >= self.max_pending:
+                raise ExecutorBusyError(f'{self._pending} requests are already pending')
+            self._pending += 1
+        if previous is not None:
+            self._superseded.add(previous)
+        future = self._pool.submit(func, *args)
+        future.add_done_callback(self._release)
+        if key is not None:
+            self._latest[key] = future
+
+        try:
+            result = await asyncio.wait_for(asyncio.wrap_future(future), timeout)
+        except asyncio.CancelledError:
+            if future in self._superseded and future.cancelled():
+                raise SupersededError('superseded by a newer request') from None
+            raise
+        finally:
+            if key is not None and self._latest.get(key) is future:
+                del self._latest[key]
+            superseded = future in self._superseded
+            self._superseded.discard(future)
+
+        if superseded:
+            raise SupersededError('superseded by a newer request')
+        return result
+
+    def shutdown(self):
+        """
+        Stop the worker threads once running requests have finished.
+        """
+        self._pool.shutdown(wait=True, cancel_futures=True)
@@ -1,72 +1,153 @@
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, Response
 from pyplotdesigner.core.design import Design
+from pyplotdesigner.core.decoding import LayoutDecoder, LayoutValidationError
+from pyplotdesigner.gui.sessions import SessionStore
+from pyplotdesigner.gui.cache import ResponseCache, get_canonical_hash
 
 
-def handle_update_layout(data, verbose=False):
+# live designs kept between requests by the session API
+SESSIONS = SessionStore()
+
+# solved /api/update_layout responses by payload hash
+RESPONSE_CACHE = ResponseCache()
+
+# payload fields that do not affect the response of handle_update_layout
+UNCACHED_FIELDS = ('client_id', 'viewport')
+
+DECODER = LayoutDecoder()
+VALIDATING_DECODER = LayoutDecoder(validate=True)
+
+CONSTANT_OPERATIONS = ('add_constant', 'set_constant', 'update_constant')
+CONSTRAINT_OPERATIONS = ('add_constraint', 'remove_constraint')
+
+
+def _build_design(data, validate=False):
+    decoder = VALIDATING_DECODER if validate else DECODER
+    return decoder.decode(data, Design())
+
+
+def get_full_state(design):
+    """
+    Get the elements, constraints, and constants of a design as a response dict.
+    """
+    return {
+        "elements": [e.to_dict() for e in design.elements],
+        "constraints": [c.to_dict() for c in design.constraints],
+        "constants": [c.to_dict() for c in design.constants]
+    }
+
+
+def get_state_hash(state):
+    """
+    Get a hash identifying the elements, constraints, and constants of a
+    layout payload or response.
+
+    :arg state: dict with 'elements', 'constraints', and 'constants' lists
+    :return: hex string
+    """
+    return get_canonical_hash([state.get(key, [])
+                               for key in ('elements', 'constraints', 'constants')])
+
+
+def _get_element_patch(old_elements, new_elements):
+    """
+    Get JSON patch operations that turn old_elements into new_elements,
+    matching elements by ID where the order is otherwise preserved.
+    """
+    new_ids = set(el.get('id', None) for el in new_elements)
+    patch = []
+    kept = []
+    for i in reversed(range(len(old_elements))):
+        if old_elements[i].get('id', None) in new_ids:
+            kept.append(old_elements[i])
+        else:
+            patch.append({'op': 'remove', 'path': f'/elements/{i}'})
+    kept.reverse()
+
+    if len(kept) > len(new_elements) or \
+            any(old.get('id', None) != new['id'] for old, new in zip(kept, new_elements)):
+        return [{'op': 'replace', 'path': '/elements', 'value': new_elements}]
+
+    for i, (old, new) in enumerate(zip(kept, new_elements)):
+        if any(old.get(key, None) != value for key, value in new.items()):
+            patch.append({'op': 'replace', 'path': f'/elements/{i}', 'value': new})
+    for new in new_elements[len(kept):]:
+        patch.append({'op': 'add', 'path': '/elements/-', 'value': new})
+    return patch
+
+
+def _get_patch_response(data, response):
+    """
+    Convert a full response into a delta against the state sent by the client.
+    """
+    patch = _get_element_patch(data.get('elements', []), response['elements'])
+    for key in ('constraints', 'constants'):
+        if data.get(key, []) != response[key]:
+            patch.append({'op': 'replace', 'path': f'/{key}', 'value': response[key]})
+    delta = {'base_state': data['base_state'], 'state': get_state_hash(response),
+             'patch': patch}
+    if 'error' in response:
+        delta['error'] = response['error']
+    return delta
+
+
+def handle_update_layout(data, verbose=False, cache=RESPONSE_CACHE, validate=False):
+    """
+    Build a design from the full layout payload sent by the client, apply the
+    requested action, solve, and return the resulting layout.
+
+    If the payload contains 'base_state' (which may be None initially), the
+    response is a delta instead: 'patch' holds JSON patch operations against
+    the elements, constraints, and constants that were sent, so that only
+    elements whose geometry changed need to be re-rendered, and 'state' holds
+    get_state_hash() of the result for the client to send back as its next
+    'base_state'. When the payload still matches 'base_state' and no action
+    is requested, the layout is already solved and an empty patch is returned
+    without rebuilding the design.
+
+    Responses are cached by a canonical hash of the payload, which covers the
+    elements, constraints, constants, action, and action arguments, so that
+    repeated requests for the same layout (undo/redo, several tabs, reloads)
+    are answered without rebuilding and solving the design.
+
+    :arg data: layout payload
+    :arg verbose: (default=False) print information about the design, which
+                  bypasses the cache
+    :arg cache: (default=RESPONSE_CACHE) ResponseCache to use, or None
+    :arg validate: (default=False) reject malformed payloads with status 422
+                   instead of skipping constraints that cannot be resolved
+    :return: JSONResponse or Response with the encoded JSON body
+    """
+    if cache is None or verbose:
+        return _update_layout(data, verbose=verbose, validate=validate)
+
+    content = {k: v for k, v in data.items() if k not in UNCACHED_FIELDS}
+    key = get_canonical_hash([validate, content])
+    entry = cache.get(key)
+    if entry is not None:
+        status_code, body = entry
+        return Response(content=body, status_code=status_code,
+                        media_type='application/json')
+
+    response = _update_layout(data, validate=validate)
+    cache.put(key, response.status_code, response.body)
+    return response
+
+
+def _update_layout(data, verbose=False, validate=False):
 
     # TODO: disallow constraints with the same target
 
-    def _get_attribute_or_value(val, default):
-        """
-        Helper function to get the value of an attribute or return the value itself.
-        """
-        if isinstance(val, dict):
-            id = val.get('id', None)
-            attr = val.get('attr', None)
-            if id is None:
-                if attr is None:
-                    return None
-                return float(attr)
-            if attr is None:
-                try:
-                    constv = design.get_constant_value(id)
-                except ValueError:
-                    return None
-                return constv if constv is not None else default
-            elattr = design.get_element_attribute(id, attr)
-            return elattr if elattr is not None else default
-        elif isinstance(val, (int, float)):
-            return float(val)
-        return default
-
-    design = Design()
-    elements = data.get("elements", [])
-    constraints = data.get("constraints", [])
-    constants = data.get("constants", [])
-
-    for el in elements:
-        design.add_element(**el)
-
-    for constant in constants:
-        id = constant.get('id', None)
-        value = constant.get('value', None)
-        if id is None or value is None:
-            continue
-        design.add_constant(id=id, value=value)
-
-    for constraint in constraints:
-
-        target = constraint.get('target', None)
-        source = constraint.get('source', None)
-        multiply = constraint.get('multiply', None)
-        add_before = constraint.get('add_before', None)
-        add_after = constraint.get('add_after', None)
-
-        # all constraints must have a target
-        if target is None:
-            continue
-        target = design.get_element_attribute(target.get('id', None),
-                                              target.get('attr', None))
-
-        # other fields could be element attributes, numeric values, constants, or None
-        source = _get_attribute_or_value(source, None)
-        multiply = _get_attribute_or_value(multiply, 1.)
-        add_before = _get_attribute_or_value(add_before, 0.)
-        add_after = _get_attribute_or_value(add_after, 0.)
-
-        # get new constraint
-        design.add_constraint(target=target, source=source, multiply=multiply,
-                              add_before=add_before, add_after=add_after)
+    delta = 'base_state' in data
+    if delta and data['base_state'] is not None and data.get('action', None) is None:
+        if get_state_hash(data) == data['base_state']:
+            return JSONResponse(content={'base_state': data['base_state'],
+                                         'state': data['base_state'], 'patch': []})
+
+    try:
+        design = _build_design(data, validate=validate)
+    except LayoutValidationError as e:
+        return JSONResponse(status_code=422, content={'error': [str(e)]})
 
     action = data.get("action", None)
     action_error_message = None
@@ -101,11 +182,7 @@ def handle_update_layout(data, verbose=False):
     except RuntimeError as e:
         error_message = dict(content=str(e))
 
-    response = {
-        "elements": [e.to_dict() for e in design.elements],
-        "constraints": [c.to_dict() for c in design.constraints],
-        "constants": [c.to_dict() for c in design.constants]
-    }
+    response = get_full_state(design)
 
     if error_message or action_error_message:
         response['error'] = []
@@ -114,4 +191,237 @@ def handle_update_layout(data, verbose=False):
     if action_error_message:
         response['error'].append(action_error_message)
 
+    if delta:
+        response = _get_patch_response(data, response)
+
+    return JSONResponse(content=response)
+
+
+def _apply_operation(design, operation, touched, removed):
+    """
+    Apply a single session operation to a design.
+
+    :arg design: Design of the session
+    :arg operation: dict with an 'op' key and its arguments
+    :arg touched: list that elements moved or added by the operation are
+                  appended to
+    :arg removed: list that IDs of elements removed by the operation are
+                  appended to
+    :return: error message or None
+    """
+    op = operation.get('op', None)
+
+    if op == 'move_element':
+        element = design.get_element(operation.get('id', None))
+        if element is None:
+            return f"op:move_element element {operation.get('id', None)} not found"
+        try:
+            values = {attr: float(operation[attr]) for attr in ('x', 'y', 'width', 'height')
+                      if operation.get(attr, None) is not None}
+        except (TypeError, ValueError):
+            return f"op:move_element invalid geometry for element {element.id}"
+        for attr, value in values.items():
+            getattr(element, attr).set(value)
+        touched.append(element)
+    elif op == 'add_element':
+        touched.append(design.add_empty_element(element_type=operation.get('type', 'axis'),
+                                                id=operation.get('id', None),
+                                                text=operation.get('text', None)))
+    elif op == 'remove_element':
+        element = design.get_element(operation.get('id', None))
+        if element is not None:
+            removed.append(element.id)
+            design.remove_element_by_id(element.id)
+    elif op == 'add_constant':
+        value = operation.get('value', None)
+        try:
+            value = 0.0 if value is None else float(value)
+        except (TypeError, ValueError):
+            return f"op:add_constant invalid value {value!r}"
+        design.add_constant(id=operation.get('id', None), value=value)
+    elif op == 'set_constant':
+        constant = design.get_constant(operation.get('id', None))
+        if constant is None or operation.get('value', None) is None:
+            return f"op:set_constant constant {operation.get('id', None)} not found"
+        try:
+            value = float(operation['value'])
+        except (TypeError, ValueError):
+            return f"op:set_constant invalid value {operation['value']!r}"
+        constant.value.set(value)
+    elif op == 'update_constant':
+        design.update_constant(operation.get('id', None), operation.get('constant', None))
+    elif op == 'add_constraint':
+        # a new constraint replaces any existing ones that write the same
+        # attribute, e.g., 'right' replaces 'x', but only once it was validated
+        try:
+            constraint = VALIDATING_DECODER.add_constraint(
+                design, operation.get('constraint', None) or {})
+        except LayoutValidationError as e:
+            return f'op:add_constraint {e}'
+        for existing in design.get_constraints_writing(constraint.target):
+            if existing is not constraint:
+                design.remove_constraint(existing)
+    elif op == 'remove_constraint':
+        target = operation.get('target', None) or {}
+        existing = design.get_constraint(target.get('id', None), target.get('attr', None))
+        if existing is not None:
+            design.remove_constraint(existing)
+    else:
+        return f'op {op} not recognized'
+    return None
+
+
+def build_solved_design(data):
+    """
+    Build a design from a full layout payload and solve it.
+
+    :arg data: layout payload as sent to handle_update_layout()
+    :return: (design, errors) where errors lists solver error messages
+    """
+    design = _build_design(data)
+    errors = []
+    try:
+        design.solve()
+    except RuntimeError as e:
+        errors.append(dict(content=str(e)))
+    return design, errors
+
+
+def apply_session_operations(session, operations):
+    """
+    Apply a list of operations to a session, re-solve, and describe the
+    changes. See handle_session_update() for the supported operations.
+
+    :arg session: Session to modify
+    :arg operations: list of operation dicts
+    :return: response dict with 'version', 'elements', 'removed', and where
+             applicable 'constraints', 'constants', and 'error'
+    """
+    errors = []
+
+    with session.lock:
+        design = session.design
+        touched = []
+        removed = []
+        for operation in operations:
+            message = _apply_operation(design, operation, touched, removed)
+            if message is not None:
+                errors.append(message)
+
+        try:
+            applied = design.solve()
+        except RuntimeError as e:
+            errors.append(dict(content=str(e)))
+            applied = []
+
+        # only elements that were touched or written by an applied constraint
+        # can have changed, so the rest of the design is never visited
+        changed = {}
+        for el in touched:
+            changed.setdefault(id(el), el)
+        for constraint in applied:
+            el = constraint.target.owner
+            changed.setdefault(id(el), el)
+        changed = [el for el in changed.values() if el._design is design]
+        removed = list(dict.fromkeys(element_id for element_id in removed
+                                     if design.get_element(element_id) is None))
+        session.version += 1
+
+        ops = set(operation.get('op', None) for operation in operations)
+        response = {
+            'version': session.version,
+            'elements': [el.to_dict() for el in changed],
+            'removed': removed,
+        }
+        if ops.intersection(CONSTRAINT_OPERATIONS + ('remove_element', 'update_constant')):
+            response['constraints'] = [c.to_dict() for c in design.constraints]
+        if ops.intersection(CONSTANT_OPERATIONS):
+            response['constants'] = [c.to_dict() for c in design.constants]
+
+    if errors:
+        response['error'] = errors
+    return response
+
+
+def handle_create_session(data, sessions=SESSIONS):
+    """
+    Build a design from a full layout payload, solve it, and keep it alive
+    as a session that later requests can modify with small operations.
+
+    :arg data: layout payload as sent to handle_update_layout()
+    :arg sessions: (default=SESSIONS) SessionStore to register the session in
+    :return: JSONResponse with the full solved layout, 'session_id', and 'version'
+    """
+    design, error = build_solved_design(data)
+    session = sessions.create(design)
+    response = get_full_state(design)
+    response['session_id'] = session.id
+    response['version'] = session.version
+    if error:
+        response['error'] = error
+    return JSONResponse(content=response)
+
+
+def handle_session_update(session_id, data, sessions=SESSIONS):
+    """
+    Apply a list of operations to a live session and re-solve only the
+    constraints affected by them.
+
+    Supported operations are
+        {'op': 'move_element', 'id': ..., 'x': ..., 'y': ..., 'width': ..., 'height': ...}
+        {'op': 'add_element', 'type': 'axis', 'id': None, 'text': None}
+        {'op': 'remove_element', 'id': ...}
+        {'op': 'add_constant', 'id': None, 'value': 0.0}
+        {'op': 'set_constant', 'id': ..., 'value': ...}
+        {'op': 'update_constant', 'id': ..., 'constant': {'id': ..., 'value': ...}}
+        {'op': 'add_constraint', 'constraint': {...}}
+        {'op': 'remove_constraint', 'target': {'id': ..., 'attr': ...}}
+
+    The response lists only the elements that were added, modified by an
+    operation, or targeted by a constraint that the solver re-applied under
+    'elements', and the IDs of removed elements under 'removed'. 'constants'
+    and 'constraints' are included in full only when an operation could have
+    changed them.
+
+    :arg session_id: ID returned by handle_create_session()
+    :arg data: dict with a list of operations under 'operations'
+    :arg sessions: (default=SESSIONS) SessionStore holding the session
+    :return: JSONResponse, with status 404 if the session does not exist
+    """
+    session = sessions.get(session_id)
+    if session is None:
+        return JSONResponse(status_code=404,
+                            content={'error': [f'session {session_id} not found']})
+
+    response = {'session_id': session.id}
+    response.update(apply_session_operations(session, data.get('operations', [])))
     return JSONResponse(content=response)
+
+
+def handle_close_session(session_id, sessions=SESSIONS):
+    """
+    Discard a session.
+
+    :arg session_id: ID returned by handle_create_session()
+    :arg sessions: (default=SESSIONS) SessionStore holding the session
+    :return: JSONResponse with 'closed' set to whether the session existed
+    """
+    return JSONResponse(content={'closed': sessions.remove(session_id)})
+
+
+def warm_up():
+    """
+    Build, solve, and serialize a small layout once so that imports and lazily
+    initialized state are ready before the first real request.
+    """
+    elements = [{'id': f'axis-{i}', 'type': 'axis', 'x': 0.2, 'y': 0.2,
+                 'width': 1, 'height': 1} for i in range(2)]
+    constraints = [{'target': {'id': 'axis-1', 'attr': 'x'},
+                    'source': {'id': 'axis-0', 'attr': 'right'},
+                    'add_after': {'id': 'spacing', 'attr': None}}]
+    constants = [{'id': 'spacing', 'value': 0.1}]
+    data = {'elements': elements, 'constraints': constraints, 'constants': constants}
+    # a throwaway cache exercises the caching path without filling the shared one
+    cache = ResponseCache()
+    handle_update_layout(data, cache=cache)
+    handle_update_layout(dict(data, base_state=None), cache=cache)
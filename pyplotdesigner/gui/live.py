@@ -0,0 +1,163 @@
+import asyncio
+
+from fastapi import WebSocketDisconnect
+
+from pyplotdesigner.gui.handlers import (build_solved_design, apply_session_operations,
+                                         get_full_state)
+from pyplotdesigner.gui.sessions import Session
+
+
+class PendingUpdates:
+    """
+    Messages received from a live connection that have not been solved yet.
+
+    A full layout message supersedes everything received before it, and
+    consecutive moves of the same element collapse into a single move, so
+    that a burst of drag events is solved once for its latest state.
+    """
+
+    def __init__(self):
+        self.layout = None
+        self.operations = []
+        self.received = 0
+        self.closed = False
+        self._event = asyncio.Event()
+
+    def push(self, message):
+        """
+        Add a message from the client.
+
+        :arg message: {'type': 'layout', ...} with a full layout payload or
+                      {'type': 'operations', 'operations': [...]}
+        """
+        if message.get('type', None) == 'layout':
+            self.layout = message
+            self.operations = []
+        else:
+            for operation in message.get('operations', []):
+                self._add_operation(operation)
+        self.received += 1
+        self._event.set()
+
+    def _add_operation(self, operation):
+        if operation.get('op', None) == 'move_element' and self.operations:
+            last = self.operations[-1]
+            if last.get('op', None) == 'move_element' and \
+                    last.get('id', None) == operation.get('id', None):
+                merged = dict(last)
+                merged.update((key, value) for key, value in operation.items()
+                              if value is not None)
+                self.operations[-1] = merged
+                return
+        self.operations.append(operation)
+
+    def close(self):
+        """
+        Mark the connection as closed, waking up any pending pop().
+        """
+        self.closed = True
+        self._event.set()
+
+    async def pop(self):
+        """
+        Wait for new messages and take everything received so far.
+
+        :return: (layout, operations, received) where layout is the latest
+                 full layout message or None, operations are the coalesced
+                 operations to apply after it, and received is the number of
+                 messages they replace, or None once the connection is closed
+        """
+        await self._event.wait()
+        if self.closed:
+            return None
+        result = (self.layout, self.operations, self.received)
+        self.layout = None
+        self.operations = []
+        self.received = 0
+        self._event.clear()
+        return result
+
+
+def solve_live_update(session, layout, operations):
+    """
+    Solve one coalesced batch of live updates.
+
+    :arg session: Session of the connection or None if no layout was sent yet
+    :arg layout: full layout message or None
+    :arg operations: list of operations to apply after the layout
+    :return: (session, response dict)
+    """
+    if layout is not None:
+        design, errors = build_solved_design(layout)
+        session = Session(None, design)
+        if operations:
+            errors.extend(apply_session_operations(session, operations).get('error', []))
+        response = get_full_state(design)
+        response['type'] = 'layout'
+        response['version'] = session.version
+        if errors:
+            response['error'] = errors
+        return session, response
+
+    if session is None:
+        return None, {'type': 'update', 'error': ['no layout received yet']}
+    response = apply_session_operations(session, operations)
+    response['type'] = 'update'
+    return session, response
+
+
+async def run_live_connection(websocket, executor=None):
+    """
+    Serve an accepted WebSocket connection.
+
+    The client sends {'type': 'layout', ...} with a full layout payload to
+    (re)start, followed by {'type': 'operations', 'operations': [...]} with
+    the session operations described in handle_session_update(). Messages are
+    received while the previous batch is being solved and coalesced, and each
+    solve answers with one message: the full layout with type 'layout' after
+    a layout message, otherwise the changed elements with type 'update'.
+    Every reply carries 'received', the number of client messages it covers.
+    If a batch cannot be solved, e.g., because the executor is busy, the reply
+    only carries 'error' and the connection keeps its previous state.
+
+    :arg websocket: accepted fastapi.WebSocket
+    :arg executor: (default=None) SolveExecutor to solve in, or None to use
+                   the default thread pool of the event loop
+    """
+    pending = PendingUpdates()
+
+    async def receive():
+        try:
+            while True:
+                pending.push(await websocket.receive_json())
+        except WebSocketDisconnect:
+            pass
+        finally:
+            pending.close()
+
+    receiver = asyncio.create_task(receive())
+    loop = asyncio.get_running_loop()
+    session = None
+    try:
+        while True:
+            batch = await pending.pop()
+            if batch is None:
+                break
+            layout, operations, received = batch
+            # solve in a worker thread so that newer messages keep arriving, without
+            # a timeout since the session is only replaced once the solve finishes
+            try:
+                if executor is None:
+                    session, response = await loop.run_in_executor(
+                        None, solve_live_update, session, layout, operations)
+                else:
+                    session, response = await executor.run(
+                        solve_live_update, session, layout, operations, timeout=None)
+            except Exception as e:
+                # a failed batch is reported and the previous session is kept
+                response = {'type': 'update' if layout is None else 'layout',
+                            'error': [str(e) or type(e).__name__]}
+            response['received'] = received
+            await websocket.send_json(response)
+    finally:
+        receiver.cancel()
@@ -1,13 +1,32 @@
-from fastapi import FastAPI, Request
-from fastapi.responses import RedirectResponse
+from fastapi import FastAPI, Request, WebSocket
+from fastapi.responses import RedirectResponse, JSONResponse
 from fastapi.staticfiles import StaticFiles
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
+from contextlib import asynccontextmanager
 from pathlib import Path
+import argparse
+import asyncio
 import uvicorn
 
-from pyplotdesigner.gui.handlers import handle_update_layout
+from pyplotdesigner.gui.handlers import (handle_update_layout, handle_create_session,
+                                         handle_session_update, handle_close_session,
+                                         warm_up, RESPONSE_CACHE)
+from pyplotdesigner.gui.live import run_live_connection
+from pyplotdesigner.gui.executor import SolveExecutor, SupersededError, ExecutorBusyError
 
-app = FastAPI()
+# solving and serialization run here instead of on the event loop
+solver = SolveExecutor()
+
+
+@asynccontextmanager
+async def lifespan(app):
+    # finish imports and start a worker thread before accepting traffic
+    await solver.run(warm_up, timeout=None)
+    yield
+
+
+app = FastAPI(lifespan=lifespan)
 
 app.add_middleware(
     CORSMiddleware,
@@ -16,6 +35,9 @@ app.add_middleware(
     allow_headers=["*"]
 )
 
+# large layouts compress well, small responses are sent as they are
+app.add_middleware(GZipMiddleware, minimum_size=4096, compresslevel=5)
+
 frontend_path = Path(__file__).parent / "webapp"
 app.mount("/ui", StaticFiles(directory=frontend_path, html=True), name="static")
 
@@ -25,18 +47,103 @@ async def root():
     return RedirectResponse(url="/ui")
 
 
+async def run_handler(handler, *args, key=None):
+    """
+    Run a handler in the solver pool, turning executor errors into responses.
+    """
+    try:
+        return await solver.run(handler, *args, key=key)
+    except SupersededError as e:
+        return JSONResponse(status_code=409,
+                            content={'superseded': True, 'error': [str(e)]})
+    except ExecutorBusyError as e:
+        return JSONResponse(status_code=503, content={'error': [f'server busy, {e}']})
+    except asyncio.TimeoutError:
+        return JSONResponse(status_code=504, content={
+            'error': [f'solving took longer than {solver.timeout} seconds']})
+
+
 @app.post("/api/update_layout")
 async def update_layout(request: Request):
     data = await request.json()
-    return handle_update_layout(data)
+    # only plain updates supersede each other, actions like 'add' must not be dropped
+    key = data.get('client_id', None) if data.get('action', None) is None else None
+    return await run_handler(handle_update_layout, data, key=key)
+
+
+@app.post("/api/sessions")
+async def create_session(request: Request):
+    data = await request.json()
+    return await run_handler(handle_create_session, data)
+
+
+@app.post("/api/sessions/{session_id}")
+async def update_session(session_id: str, request: Request):
+    data = await request.json()
+    return await run_handler(handle_session_update, session_id, data, key=session_id)
+
+
+@app.delete("/api/sessions/{session_id}")
+async def close_session(session_id: str):
+    return handle_close_session(session_id)
+
+
+@app.get("/api/stats")
+async def stats():
+    return {'cache': RESPONSE_CACHE.get_stats(), 'pending_solves': solver.pending}
+
+
+@app.websocket("/api/live")
+async def live_updates(websocket: WebSocket):
+    await websocket.accept()
+    await run_live_connection(websocket, executor=solver)
+
+
+def main(argv=None):
+    """
+    Run the web interface.
+
+    By default the server runs in development mode, with a single process
+    that reloads when the source changes. With --production the reloader is
+    disabled and the app can be served by several worker processes. Note
+    that sessions created with /api/sessions live in the process that created
+    them, so the session API requires a single worker or sticky routing.
+
+    :arg argv: (default=None) command line arguments, or None for sys.argv
+    """
+    parser = argparse.ArgumentParser(prog='pyplotdesigner-gui',
+                                     description='Run the pyplotdesigner web interface.')
+    parser.add_argument('--host', default='127.0.0.1',
+                        help='address to bind to (default: 127.0.0.1)')
+    parser.add_argument('--port', type=int, default=8080,
+                        help='port to listen on (default: 8080)')
+    parser.add_argument('--production', action='store_true',
+                        help='disable autoreload and allow multiple workers')
+    parser.add_argument('--workers', type=int, default=1,
+                        help='number of worker processes in production mode (default: 1)')
+    parser.add_argument('--log-level', default=None,
+                        help='uvicorn log level (default: warning, info in production)')
+    args = parser.parse_args(argv)
 
+    if args.workers < 1:
+        parser.error('--workers must be at least 1')
+    if args.workers > 1 and not args.production:
+        parser.error('--workers requires --production')
 
-def main():
-    uvicorn.run("pyplotdesigner.gui.main:app",
-                host="127.0.0.1",
-                port=8080,
-                reload=True,
-                log_level="warning")
+    if args.production:
+        uvicorn.run("pyplotdesigner.gui.main:app",
+                    host=args.host,
+                    port=args.port,
+                    workers=args.workers,
+                    reload=False,
+                    proxy_headers=True,
+                    log_level=args.log_level or "info")
+    else:
+        uvicorn.run("pyplotdesigner.gui.main:app",
+                    host=args.host,
+                    port=args.port,
+                    reload=True,
+                    log_level=args.log_level or "warning")
 
 
 if __name__ == "__main__":
@@ -0,0 +1,88 @@
+import threading
+import time
+import uuid
+from collections import OrderedDict
+
+
+class Session:
+    """
+    A live Design held by the server between requests, so that edits can be
+    applied as small operations and re-solved incrementally.
+    """
+
+    def __init__(self, session_id, design):
+        self.id = session_id
+        self.design = design
+        self.version = 0
+        self.lock = threading.Lock()
+        self.last_access = time.monotonic()
+
+
+class SessionStore:
+    """
+    Thread-safe registry of sessions. The least recently used session is
+    dropped when max_sessions is exceeded, and sessions that have not been
+    accessed for ttl seconds expire.
+    """
+
+    def __init__(self, max_sessions=64, ttl=3600.):
+        self.max_sessions = max_sessions
+        self.ttl = ttl
+        self._sessions = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._sessions)
+
+    def __contains__(self, session_id):
+        return session_id in self._sessions
+
+    def create(self, design):
+        """
+        Register a new session for a design.
+
+        :arg design: Design to keep alive
+        :return: Session instance with a new unique ID
+        """
+        session = Session(uuid.uuid4().hex, design)
+        with self._lock:
+            self._expire()
+            self._sessions[session.id] = session
+            while len(self._sessions) > self.max_sessions:
+                self._sessions.popitem(last=False)
+        return session
+
+    def get(self, session_id):
+        """
+        Get a session by its ID and mark it as recently used.
+
+        :arg session_id: ID returned by create()
+        :return: Session instance or None if unknown or expired
+        """
+        with self._lock:
+            self._expire()
+            session = self._sessions.get(session_id)
+            if session is not None:
+                session.last_access = time.monotonic()
+                self._sessions.move_to_end(session_id)
+            return session
+
+    def remove(self, session_id):
+        """
+        Close a session.
+
+        :arg session_id: ID returned by create()
+        :return: True if the session existed
+        """
+        with self._lock:
+            return self._sessions.pop(session_id, None) is not None
+
+    def _expire(self):
+        if self.ttl is None:
+            return
+        cutoff = time.monotonic() - self.ttl
+        while self._sessions:
+            session = next(iter(self._sessions.values()))
+            if session.last_access >= cutoff:
+                break
+            self._sessions.popitem(last=False)
@@ -1,7 +1,10 @@
 import { canvas, borderWidth, setScale, getScale, getFigureSize, setFigureSize } from './shared.js';
 import { renderLayout, renderConstantsList, renderConstraintsList } from './render.js';
 import { constraintsEqual } from './constraints.js';
-import { getImageCoords } from './canvas.js';
+import { getImageCoords, getScreenCoords } from './canvas.js';
+
+// identifies this tab so that the server can drop requests superseded by newer ones
+const clientId = Math.random().toString(36).slice(2) + Date.now().toString(36);
 
 export function getLayoutPayload() {
     const elements = Array.from(canvas.children)
@@ -36,7 +39,7 @@ export function getLayoutPayload() {
         figureHeight: getFigureSize().height
     };
 
-    return { elements, constraints, constants, viewport };
+    return { elements, constraints, constants, viewport, client_id: clientId };
 }
 
 export function deleteConstant(constant) {
@@ -126,7 +129,65 @@ export function sendLayoutUpdate() {
     });
 }
 
+let liveSocket = null;
+
+export function openLiveConnection() {
+    const protocol = window.location.protocol === 'https:' ? 'wss:' : 'ws:';
+    const socket = new WebSocket(`${protocol}//${window.location.host}/api/live`);
+    socket.onmessage = event => applyLiveUpdate(JSON.parse(event.data));
+    socket.onclose = () => {
+        if (liveSocket === socket) {
+            liveSocket = null;
+        }
+    };
+    liveSocket = socket;
+}
+
+function liveConnectionReady() {
+    return liveSocket !== null && liveSocket.readyState === WebSocket.OPEN;
+}
+
+export function sendLiveLayout() {
+    if (!liveConnectionReady()) return;
+    const payload = getLayoutPayload();
+    payload.type = 'layout';
+    liveSocket.send(JSON.stringify(payload));
+}
+
+export function sendLiveMove(el) {
+    if (!liveConnectionReady()) return;
+    const screenX = parseInt(el.style.left, 10);
+    const screenY = parseInt(el.style.top, 10);
+    const screenWidth = parseInt(el.style.width, 10) + 2 * borderWidth;
+    const screenHeight = parseInt(el.style.height, 10) + 2 * borderWidth;
+    const { imageX, imageY } = getImageCoords(screenX, screenY, screenWidth, screenHeight);
+    const operation = { op: 'move_element', id: el.dataset.id, x: imageX, y: imageY };
+    liveSocket.send(JSON.stringify({ type: 'operations', operations: [operation] }));
+}
+
+function applyLiveUpdate(data) {
+    if (data.error) {
+        console.error('Error received from server:', data.error);
+        return;
+    }
+
+    // move elements in place so that the one being dragged keeps its handlers
+    (data.elements || []).forEach(el => {
+        const div = Array.from(canvas.children).find(child => child.dataset.id === el.id);
+        if (!div || div.classList.contains('dragging')) return;
+        const { screenX, screenY, screenWidth, screenHeight } = getScreenCoords(el.x, el.y, el.width, el.height);
+        div.style.left = screenX + 'px';
+        div.style.top = screenY + 'px';
+        div.style.width = screenWidth - 2 * borderWidth + 'px';
+        div.style.height = screenHeight - 2 * borderWidth + 'px';
+    });
+}
+
 export function processReceivedPayload(data) {
+    if (data.superseded) {
+        // a newer update is on its way
+        return;
+    }
     if (data.error) {
         console.error('Error received from server:', data.error);
         return;
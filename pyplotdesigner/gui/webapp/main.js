@@ -1,7 +1,7 @@
 import { canvas, setSelectedItem, setScale, setFigureSize } from './shared.js';
 import { restorePanelSizes, toggleDarkMode, setupResizablePanels } from './ui.js';
 import { drawGrid, openLayoutModal } from './canvas.js';
-import { sendAdd, sendLayoutUpdate, getLayoutPayload, processReceivedPayload } from './api.js'
+import { sendAdd, sendLayoutUpdate, getLayoutPayload, processReceivedPayload, openLiveConnection } from './api.js'
 import { renderLayout, updateElementFromProps } from './render.js'
 import { updateConstantFromProps } from './constants.js';
 
@@ -113,6 +113,7 @@ window.addEventListener('load', () => {
 window.addEventListener('DOMContentLoaded', () => {
     restorePanelSizes();
     setupResizablePanels();
+    openLiveConnection();
 
     if (localStorage.getItem('darkMode') === 'on') {
         document.body.classList.add('dark');
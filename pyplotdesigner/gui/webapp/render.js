@@ -1,7 +1,7 @@
 import { canvas, arrowCanvas, borderWidth, setSelectedItem, getSelectedItem, startSelecting, completeSelection } from './shared.js';
 import { drawGrid, getImageCoords, getScreenCoords } from './canvas.js';
 import { getConstraintDescription, getNameOfElement, getVariableDescription, constraintsEqual } from './constraints.js';
-import { sendLayoutUpdate, sendDelete, deleteConstant, deleteConstraint } from './api.js';
+import { sendLayoutUpdate, sendDelete, deleteConstant, deleteConstraint, sendLiveLayout, sendLiveMove } from './api.js';
 
 function renderConstantDetail(constant) {
     let props = document.getElementById('props');
@@ -626,14 +626,18 @@ function makeDraggable(el) {
         setActiveFromElement(el);
         let offsetX = e.clientX - el.offsetLeft;
         let offsetY = e.clientY - el.offsetTop;
+        el.classList.add('dragging');
+        sendLiveLayout();
 
         function move(e) {
             el.style.left = (e.clientX - offsetX) + 'px';
             el.style.top = (e.clientY - offsetY) + 'px';
             updateProps(el);
+            sendLiveMove(el);
         }
 
         function stop() {
+            el.classList.remove('dragging');
             sendLayoutUpdate();
             document.removeEventListener('mousemove', move);
             document.removeEventListener('mouseup', stop);
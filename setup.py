@@ -8,6 +8,11 @@ setup(
     author='gnwong',
     author_email='gnwong@ias.edu',
     url="https://github.com/gnwong/pyplotdesigner",
+    entry_points={
+        "console_scripts": [
+            "pyplotdesigner-gui=pyplotdesigner.gui.main:main",
+        ],
+    },
     classifiers=[
         "Programming Language :: Python :: 3",
         "License :: OSI Approved :: MIT License",
@@ -0,0 +1,180 @@
+__copyright__ = """Copyright (C) 2025 George N. Wong"""
+__license__ = """
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in
+all copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+THE SOFTWARE.
+"""
+
+import pytest
+
+from pyplotdesigner.core.design import Design
+
+
+def test_id_lookup():
+
+    design = Design()
+    for i in range(5):
+        design.add_element(id=f'axis-{i}', type='axis')
+    spacing = design.add_constant(id='spacing', value=0.1)
+
+    assert design.get_element('axis-3') is design.elements[3]
+    assert design.get_element('missing') is None
+    assert design.get_constant('spacing') is spacing
+    assert design.get_constant_value('spacing') is spacing.value
+    assert design.get_element_attribute('axis-2', 'right').get() == 1.
+
+    # renaming a constant keeps the lookup consistent
+    design.update_constant('spacing', {'id': 'gap', 'value': 0.2})
+    assert design.get_constant('spacing') is None
+    assert design.get_constant('gap') is spacing
+    assert spacing.value.get() == 0.2
+    with pytest.raises(ValueError):
+        design.get_constant_value('spacing')
+
+    # renaming onto an existing id is refused
+    design.add_constant(id='other', value=1.)
+    design.update_constant('other', {'id': 'gap', 'value': 2.})
+    assert design.get_constant('gap') is spacing
+    assert design.get_constant('other').value.get() == 1.
+
+    # removed elements can no longer be found
+    design.remove_element_by_id('axis-3')
+    assert design.get_element('axis-3') is None
+    with pytest.raises(ValueError):
+        design.get_element_attribute('axis-3', 'x')
+    assert design.get_element('axis-4') is design.elements[3]
+
+    # elements that share an id are found in the order they were added
+    first = design.add_element(id='axis-4', type='axis')
+    second = design.add_element(id='axis-4', type='axis')
+    design.remove_element_by_id('axis-4')
+    assert design.get_element('axis-4') is first
+    assert design.elements[-2:] == [first, second]
+    design.remove_element_by_id('axis-4')
+    assert design.get_element('axis-4') is second
+    design.remove_element_by_id('axis-4')
+    assert design.get_element('axis-4') is None
+    assert [el.id for el in design.elements] == ['axis-0', 'axis-1', 'axis-2']
+
+
+def test_unique_ids():
+
+    design = Design()
+    design.add_element(id='axis-1', type='axis')
+    design.add_constant(id='axis-3', value=0.)
+
+    assert design.get_unique_id(prefix='axis-') == 'axis-0'
+    assert design.get_unique_id(prefix='axis-') == 'axis-0'
+
+    for _ in range(12000):
+        design.add_empty_element(element_type='axis')
+    assert design.elements[-1].id == 'axis-12001'
+    assert design.get_element('axis-12001') is design.elements[-1]
+
+    design.add_constant()
+    assert design.constants[-1].id == 'constant0'
+
+
+def test_referencing_constraints():
+
+    design = Design()
+    a = design.add_element(id='a', type='axis')
+    b = design.add_element(id='b', type='axis')
+    c = design.add_element(id='c', type='axis')
+    spacing = design.add_constant(id='spacing', value=0.1)
+    ab = design.add_constraint(b.x, a.right, add_after=spacing.value)
+    bc = design.add_constraint(c.x, b.right, add_after=spacing.value)
+    cc = design.add_constraint(c.y, 1.)
+
+    assert design.get_referencing_constraints('a') == [ab]
+    assert design.get_referencing_constraints(b) == [ab, bc]
+    assert design.get_referencing_constraints('spacing') == [ab, bc]
+    assert design.get_constraint('c', 'x') is bc
+    assert design.get_constraint(c, 'y') is cc
+    assert design.get_constraint('c', 'width') is None
+    assert design.get_constraints_writing(c.left) == [bc]
+    assert design.get_constraints_writing(c.center_x) == [bc]
+    assert design.get_constraints_writing(c.top) == [cc]
+    assert design.get_constraints_writing(c.width) == []
+
+    # changing an input moves the constraint between owners
+    bc.set_attribute('source', a.top)
+    assert design.get_referencing_constraints('b') == [ab]
+    assert design.get_referencing_constraints('a') == [ab, bc]
+
+    design.remove_element_by_id('a')
+    assert design.constraints == [cc]
+    assert design.get_referencing_constraints('spacing') == []
+    assert design.get_constraint('b', 'x') is None
+    assert design.get_constraint('c', 'y') is cc
+
+
+def make_panels(n, offset=0., reverse=False, text=None):
+    design = Design()
+    spacing = design.add_constant(id='spacing', value=0.1)
+    indices = range(n)[::-1] if reverse else range(n)
+    panels = {}
+    for i in indices:
+        panels[i] = design.add_element(id=f'axis-{i}', type='axis', x=i + offset, y=0.,
+                                       text=text)
+    for i in indices:
+        if i > 0:
+            design.add_constraint(panels[i].x, panels[i-1].right, add_after=spacing.value)
+    return design
+
+
+def test_equivalence():
+
+    design = make_panels(2000)
+    assert design.is_equivalent_to(make_panels(2000))
+    assert design.is_equivalent_to(make_panels(2000, offset=1.e-9, reverse=True))
+    assert not design.is_equivalent_to(make_panels(2000, offset=1.e-3))
+    assert not design.is_equivalent_to(make_panels(1999))
+
+    # elements that only differ in geometry are matched up by position
+    design = make_panels(50, text='panel')
+    other = make_panels(50, offset=1.e-9, reverse=True, text='panel')
+    assert design.is_equivalent_to(other)
+    assert not design.is_equivalent_to(make_panels(50, offset=0.5, text='panel'))
+
+    other = make_panels(50, text='panel')
+    other.get_constant('spacing').value.set(0.2)
+    assert not design.is_equivalent_to(other)
+
+    other = make_panels(50, text='panel')
+    other.get_constraint('axis-3', 'x').set_attribute('add_before', 1.)
+    assert not design.is_equivalent_to(other)
+
+    # constraints must refer to the matching element, not just to any element
+    # with the same type and text
+    def make_pair(target):
+        design = Design()
+        p = design.add_element(id='p', type='axis', x=0., text='panel')
+        q = design.add_element(id='q', type='axis', x=5., text='panel')
+        design.add_constraint({'p': p, 'q': q}[target].y, 0.5)
+        return design
+
+    assert make_pair('p').is_equivalent_to(make_pair('p'))
+    assert not make_pair('p').is_equivalent_to(make_pair('q'))
+
+
+if __name__ == "__main__":
+
+    test_id_lookup()
+    test_unique_ids()
+    test_referencing_constraints()
+    test_equivalence()
@@ -0,0 +1,127 @@
+__copyright__ = """Copyright (C) 2025 George N. Wong"""
+__license__ = """
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in
+all copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+THE SOFTWARE.
+"""
+
+import os
+
+import numpy as np
+import matplotlib.pyplot as plt
+
+from pyplotdesigner.core.design import Design
+from pyplotdesigner.core.design_loader import (FigureTemplate, make_figure_from_b64,
+                                               make_figure_from_design, render_batch)
+
+
+def make_design():
+    design = Design(figure_width=6, figure_height=4)
+    left = design.add_element(id='left', type='axis', x=0.5, y=0.5, width=2, height=3)
+    right = design.add_element(id='right', type='axis', y=0.5, width=2, height=3)
+    design.add_constraint(right.x, left.right, add_after=0.5)
+    return design
+
+
+def test_figure_template(monkeypatch):
+
+    design = make_design()
+    template = FigureTemplate(design)
+    assert template.figsize == (6, 4)
+    assert np.allclose(template.rects[1], (3 / 6, 0.5 / 4, 2 / 6, 3 / 4))
+
+    # figures are built without pyplot and without solving again
+    monkeypatch.setattr(Design, 'solve', lambda self, **kwargs: 1 / 0)
+    figures = plt.get_fignums()
+    fig, axes = template.make_figure(dpi=50)
+    assert plt.get_fignums() == figures
+    assert list(axes) == ['left', 'right'] and fig.dpi == 50
+    assert np.allclose(axes['right'].get_position().bounds, template.rects[1])
+
+    axes['left'].plot([0, 1])
+    same, axes = template.make_figure(figure=fig)
+    assert same is fig and len(fig.axes) == 2 and not axes['left'].lines
+
+    # make_figure_from_b64 solves once
+    b64 = design.get_b64_string()
+    monkeypatch.undo()
+    calls = []
+    solve = Design.solve
+    monkeypatch.setattr(Design, 'solve', lambda self, **kwargs: calls.append(solve(self)))
+    fig, axes = make_figure_from_b64(b64)
+    assert len(calls) == 1
+    assert np.allclose(axes['right'].get_position().bounds, template.rects[1])
+    plt.close(fig)
+
+    fig, axes = make_figure_from_design(design, pyplot=False)
+    assert plt.get_fignums() == figures and len(calls) == 2
+
+
+def plot_line(fig, axes, slope):
+    axes['left'].plot([0, 1], [0, slope])
+    axes['right'].set_title(f'slope {slope}')
+
+
+def test_render_batch(tmp_path):
+
+    design = make_design()
+    figures = plt.get_fignums()
+
+    # items are consumed lazily and rendered in two worker processes
+    slopes = (slope for slope in range(7))
+    paths = render_batch(design, slopes, str(tmp_path / 'png' / 'figure-{index:02d}.png'),
+                         plot=plot_line, processes=2, max_pending=3, dpi=20)
+    assert paths == [str(tmp_path / 'png' / f'figure-{i:02d}.png') for i in range(7)]
+    assert all(os.path.getsize(path) > 0 for path in paths)
+    assert plt.get_fignums() == figures
+
+    # callables in this process, from a base64 layout
+    def draw(fig, axes):
+        assert len(fig.axes) == 2 and not axes['left'].lines
+        axes['left'].plot([0, 1])
+
+    paths = render_batch(design.get_b64_string(), [draw] * 3,
+                         lambda index: str(tmp_path / f'{index}.pdf'))
+    assert paths == [str(tmp_path / f'{i}.pdf') for i in range(3)]
+    with open(paths[-1], 'rb') as fp:
+        assert fp.read(4) == b'%PDF'
+
+    # nested calls in this process each use their own figure
+    outer = []
+    inner = []
+
+    def draw_nested(fig, axes):
+        outer.append(fig)
+        if len(outer) == 2:
+            render_batch(design, [lambda fig, axes: inner.append(fig)],
+                         str(tmp_path / 'nested-{index}.png'), dpi=20)
+        assert len(fig.axes) == 2 and not axes['left'].lines
+
+    render_batch(design, [draw_nested] * 3, str(tmp_path / 'outer-{index}.png'), dpi=20)
+    assert len(outer) == 3 and all(fig is outer[0] for fig in outer)
+    assert len(inner) == 1 and inner[0] is not outer[0]
+
+
+if __name__ == "__main__":
+
+    import tempfile
+    import pathlib
+    import pytest
+
+    test_figure_template(pytest.MonkeyPatch())
+    with tempfile.TemporaryDirectory() as tmpdir:
+        test_render_batch(pathlib.Path(tmpdir))
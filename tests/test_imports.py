@@ -0,0 +1,86 @@
+__copyright__ = """Copyright (C) 2025 George N. Wong"""
+__license__ = """
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in
+all copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+THE SOFTWARE.
+"""
+
+import subprocess
+import sys
+
+CORE_MODULES = ['pyplotdesigner.core.design', 'pyplotdesigner.core.design_loader',
+                'pyplotdesigner.core.decoding', 'pyplotdesigner.core.streaming']
+
+# generous so that slow machines pass; numpy alone takes about as long
+IMPORT_BUDGET_US = 150000
+
+
+def run_python(code, *options):
+    result = subprocess.run([sys.executable, *options, '-c', code],
+                            capture_output=True, text=True, check=True)
+    return result
+
+
+def test_lazy_imports():
+
+    # importing and solving a layout needs neither numpy nor matplotlib
+    code = '; '.join(f'import {name}' for name in CORE_MODULES) + """
+import sys
+from pyplotdesigner.core.design import Design
+design = Design()
+design.from_json_string('{"elements": [{"id": "a", "x": 0.1, "y": 0.1, "width": 0.5, '
+                        '"height": 0.5}], "constants": [], "constraints": []}')
+design.solve()
+print(sorted(name for name in ('numpy', 'matplotlib') if name in sys.modules))
+"""
+    assert run_python(code).stdout.split() == ['[]']
+
+    # matplotlib is loaded once a figure is built
+    code = """
+import sys
+from pyplotdesigner.core.design import Design
+from pyplotdesigner.core.design_loader import FigureTemplate
+design = Design()
+design.from_json_string('{"elements": [{"id": "a", "type": "axis", "x": 0.1, "y": 0.1, '
+                        '"width": 0.5, "height": 0.5}], "constants": [], '
+                        '"constraints": []}')
+fig, axes = FigureTemplate(design).make_figure()
+print('matplotlib' in sys.modules, len(axes))
+"""
+    assert run_python(code).stdout.split() == ['True', '1']
+
+
+def test_import_time():
+
+    code = '; '.join(f'import {name}' for name in CORE_MODULES)
+    stderr = run_python(code, '-X', 'importtime').stderr
+
+    # cumulative times of the top-level pyplotdesigner imports, which exclude
+    # interpreter startup
+    total = 0
+    for line in stderr.splitlines():
+        if not line.startswith('import time:'):
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        if name.strip().startswith('pyplotdesigner') and not name.startswith('  '):
+            total += int(cumulative)
+    assert 0 < total < IMPORT_BUDGET_US, total
+
+
+if __name__ == "__main__":
+    test_lazy_imports()
+    test_import_time()
@@ -1,5 +1,17 @@
 import json
-from pyplotdesigner.gui.handlers import handle_update_layout
+import asyncio
+import threading
+import time
+
+import pytest
+from pyplotdesigner.gui.handlers import (handle_update_layout, handle_create_session,
+                                         handle_session_update, handle_close_session,
+                                         get_state_hash, warm_up, RESPONSE_CACHE)
+from pyplotdesigner.gui.sessions import SessionStore
+from pyplotdesigner.gui import live
+from pyplotdesigner.gui.live import PendingUpdates
+from pyplotdesigner.gui.executor import SolveExecutor, SupersededError, ExecutorBusyError
+from pyplotdesigner.gui.cache import ResponseCache
 
 base_request_data = {
     'elements': [
@@ -202,6 +214,326 @@ def test_handle_layout():
                 add_after['id'], add_after['attr']) in known_constraints
 
 
+def test_validation():
+
+    # constraints on unknown elements are dropped, or rejected when validating
+    request = dict(base_request_data)
+    request['constraints'] = base_request_data['constraints'] + [
+        {'target': {'id': 'axis-9', 'attr': 'x'}, 'source': {'id': 'axis-0', 'attr': 'x'}}]
+    layout_data = json.loads(handle_update_layout(request).body.decode('utf-8'))
+    assert 'error' not in layout_data and len(layout_data['constraints']) == 4
+
+    response_data = handle_update_layout(request, validate=True)
+    assert response_data.status_code == 422
+    layout_data = json.loads(response_data.body.decode('utf-8'))
+    assert layout_data['error'] == ["constraints[4].target: element 'axis-9' not found"]
+
+
+def test_delta_response():
+
+    # the initial request only opts in, the patch moves axis-1 into place
+    request = dict(base_request_data, base_state=None)
+    response_data = handle_update_layout(request)
+    layout_data = json.loads(response_data.body.decode('utf-8'))
+    full_data = json.loads(handle_update_layout(base_request_data).body.decode('utf-8'))
+    assert layout_data['state'] == get_state_hash(full_data)
+    assert 'elements' not in layout_data
+    patch = layout_data['patch']
+    assert patch[0] == {'op': 'replace', 'path': '/elements/1', 'value': full_data['elements'][1]}
+    assert len(patch) == 1
+
+    # sending back the solved state is answered without any changes
+    request = dict(full_data, base_state=layout_data['state'])
+    layout_data = json.loads(handle_update_layout(request).body.decode('utf-8'))
+    assert layout_data == {'base_state': request['base_state'], 'state': request['base_state'],
+                           'patch': []}
+
+    # changing a constant only patches the element that moved
+    request['constants'] = [{'id': 'y_offset', 'value': 0.3}, {'id': 'spacing', 'value': 0.5}]
+    layout_data = json.loads(handle_update_layout(request).body.decode('utf-8'))
+    assert [op['path'] for op in layout_data['patch']] == ['/elements/1']
+    assert abs(layout_data['patch'][0]['value']['x'] - 1.7) < 1e-9
+
+    # deleting and adding elements
+    request['action'] = 'delete'
+    request['element_id'] = 'axis-0'
+    layout_data = json.loads(handle_update_layout(request).body.decode('utf-8'))
+    assert layout_data['patch'][0] == {'op': 'remove', 'path': '/elements/0'}
+    assert [op['path'] for op in layout_data['patch']] == ['/elements/0', '/constraints']
+
+    request['action'] = 'add'
+    request['new_type'] = 'axis'
+    layout_data = json.loads(handle_update_layout(request).body.decode('utf-8'))
+    assert layout_data['patch'][-1]['op'] == 'add'
+    assert layout_data['patch'][-1]['value']['id'] == 'axis-2'
+
+
+def test_sessions():
+
+    sessions = SessionStore()
+    response_data = handle_create_session(base_request_data, sessions=sessions)
+    layout_data = json.loads(response_data.body.decode('utf-8'))
+    session_id = layout_data['session_id']
+    assert layout_data['version'] == 0
+    assert len(layout_data['elements']) == 2
+
+    def update(*operations):
+        response_data = handle_session_update(session_id, {'operations': list(operations)},
+                                              sessions=sessions)
+        return json.loads(response_data.body.decode('utf-8'))
+
+    # changing a constant only returns the element that moved
+    layout_data = update({'op': 'set_constant', 'id': 'spacing', 'value': 0.5})
+    assert layout_data['version'] == 1
+    assert [el['id'] for el in layout_data['elements']] == ['axis-1']
+    assert abs(layout_data['elements'][0]['x'] - 1.7) < 1e-9
+    assert 'constraints' not in layout_data
+    assert {'id': 'spacing', 'value': 0.5} in layout_data['constants']
+
+    # moving the source element propagates to the constrained one
+    layout_data = update({'op': 'move_element', 'id': 'axis-0', 'width': 2.})
+    elements = {el['id']: el for el in layout_data['elements']}
+    assert set(elements) == {'axis-0', 'axis-1'}
+    assert abs(elements['axis-1']['x'] - 2.7) < 1e-9
+
+    # moving a constrained attribute snaps back, but is still reported
+    layout_data = update({'op': 'move_element', 'id': 'axis-1', 'x': 0.})
+    assert [el['id'] for el in layout_data['elements']] == ['axis-1']
+    assert abs(layout_data['elements'][0]['x'] - 2.7) < 1e-9
+
+    # constraints replace existing ones on the same target
+    constraint = {'target': {'id': 'axis-1', 'attr': 'x'}, 'add_before': 4.}
+    layout_data = update({'op': 'add_constraint', 'constraint': constraint},
+                         {'op': 'add_element', 'type': 'axis'})
+    assert len(layout_data['constraints']) == 4
+    elements = {el['id']: el for el in layout_data['elements']}
+    assert set(elements) == {'axis-1', 'axis-2'}
+    assert elements['axis-1']['x'] == 4.
+
+    # aliases and computed attributes replace constraints writing the same value
+    constraint = {'target': {'id': 'axis-1', 'attr': 'left'}, 'add_before': 5.}
+    layout_data = update({'op': 'add_constraint', 'constraint': constraint})
+    assert len(layout_data['constraints']) == 4
+    assert layout_data['elements'][0]['x'] == 5.
+    constraint = {'target': {'id': 'axis-1', 'attr': 'right'}, 'add_before': 4.}
+    layout_data = update({'op': 'add_constraint', 'constraint': constraint})
+    assert len(layout_data['constraints']) == 4
+    element = layout_data['elements'][0]
+    assert abs(element['x'] + element['width'] - 4.) < 1e-9
+
+    # invalid operations are reported without touching the design
+    constraint = {'target': {'id': 'axis-1', 'attr': 'x'},
+                  'source': {'id': 'missing', 'attr': 'x'}}
+    layout_data = update({'op': 'add_constraint', 'constraint': constraint},
+                         {'op': 'move_element', 'id': 'axis-0', 'x': 'abc'},
+                         {'op': 'set_constant', 'id': 'spacing', 'value': 'abc'})
+    assert len(layout_data['error']) == 3
+    assert layout_data['error'][0].startswith('op:add_constraint')
+    assert len(layout_data['constraints']) == 4
+    assert layout_data['elements'] == []
+
+    layout_data = update({'op': 'remove_element', 'id': 'axis-0'},
+                         {'op': 'unknown'})
+    assert layout_data['removed'] == ['axis-0']
+    assert layout_data['elements'] == []
+    assert len(layout_data['constraints']) == 1
+    assert layout_data['error'] == ['op unknown not recognized']
+
+    response_data = handle_close_session(session_id, sessions=sessions)
+    assert json.loads(response_data.body.decode('utf-8')) == {'closed': True}
+    response_data = handle_session_update(session_id, {}, sessions=sessions)
+    assert response_data.status_code == 404
+
+
+def test_live_updates(monkeypatch):
+
+    async def coalesce():
+        pending = PendingUpdates()
+        pending.push({'type': 'operations', 'operations': [{'op': 'set_constant'}]})
+        pending.push(dict(base_request_data, type='layout'))
+        for x in range(5):
+            move = {'op': 'move_element', 'id': 'axis-0', 'x': float(x), 'y': None}
+            pending.push({'type': 'operations', 'operations': [move]})
+        pending.push({'type': 'operations', 'operations': [
+            {'op': 'move_element', 'id': 'axis-0', 'width': 2.},
+            {'op': 'move_element', 'id': 'axis-1', 'x': 1.}]})
+        batch = await pending.pop()
+        pending.close()
+        return batch, await pending.pop()
+
+    (layout, operations, received), closed = asyncio.run(coalesce())
+    assert layout['type'] == 'layout' and received == 8 and closed is None
+    assert operations == [{'op': 'move_element', 'id': 'axis-0', 'x': 4., 'y': None,
+                           'width': 2.},
+                          {'op': 'move_element', 'id': 'axis-1', 'x': 1.}]
+
+    from fastapi.testclient import TestClient
+    from pyplotdesigner.gui.main import app
+
+    with TestClient(app).websocket_connect('/api/live') as websocket:
+        websocket.send_json({'type': 'operations', 'operations': []})
+        assert websocket.receive_json()['error'] == ['no layout received yet']
+        websocket.send_json(dict(base_request_data, type='layout'))
+        layout_data = websocket.receive_json()
+        assert layout_data['type'] == 'layout' and len(layout_data['elements']) == 2
+        websocket.send_json({'type': 'operations', 'operations': [
+            {'op': 'set_constant', 'id': 'spacing', 'value': 0.5}]})
+        layout_data = websocket.receive_json()
+        assert layout_data['type'] == 'update' and layout_data['received'] == 1
+        assert [el['id'] for el in layout_data['elements']] == ['axis-1']
+
+        # a failing solve is reported and the connection stays usable
+        def busy(*args):
+            raise ExecutorBusyError('2 requests are already pending')
+
+        with monkeypatch.context() as patch:
+            patch.setattr(live, 'solve_live_update', busy)
+            websocket.send_json({'type': 'operations', 'operations': []})
+            layout_data = websocket.receive_json()
+        assert layout_data == {'type': 'update', 'received': 1,
+                               'error': ['2 requests are already pending']}
+        websocket.send_json({'type': 'operations', 'operations': [
+            {'op': 'move_element', 'id': 'axis-0', 'width': 2.}]})
+        layout_data = websocket.receive_json()
+        assert 'error' not in layout_data
+        assert [el['id'] for el in layout_data['elements']] == ['axis-0', 'axis-1']
+
+
+def test_solve_executor():
+
+    executor = SolveExecutor(max_workers=1, max_pending=2, timeout=5.)
+    release = threading.Event()
+
+    def work(value):
+        release.wait(5.)
+        return value
+
+    async def run_requests():
+        # the first request occupies the only worker, the second is superseded
+        # by the third before it starts, which frees its slot, and the fourth
+        # exceeds max_pending
+        first = asyncio.ensure_future(executor.run(work, 1, key='a'))
+        second = asyncio.ensure_future(executor.run(work, 2, key='b'))
+        await asyncio.sleep(0.01)
+        third = asyncio.ensure_future(executor.run(work, 3, key='b'))
+        await asyncio.sleep(0.01)
+        with pytest.raises(ExecutorBusyError):
+            await executor.run(work, 4)
+        release.set()
+        return await asyncio.gather(first, second, third, return_exceptions=True)
+
+    first, second, third = asyncio.run(run_requests())
+    assert first == 1 and third == 3
+    assert isinstance(second, SupersededError)
+    assert executor.pending == 0
+
+    # results of requests superseded while running are discarded
+    async def run_superseded():
+        release.clear()
+        first = asyncio.ensure_future(executor.run(work, 1, key='a'))
+        await asyncio.sleep(0.01)
+        second = asyncio.ensure_future(executor.run(time.sleep, 0, key='a'))
+        release.set()
+        return await asyncio.gather(first, second, return_exceptions=True)
+
+    first, second = asyncio.run(run_superseded())
+    assert isinstance(first, SupersededError) and second is None
+
+    # a request rejected at capacity does not supersede the running one
+    busy_executor = SolveExecutor(max_workers=1, max_pending=1, timeout=5.)
+
+    async def run_at_capacity():
+        release.clear()
+        first = asyncio.ensure_future(busy_executor.run(work, 1, key='a'))
+        await asyncio.sleep(0.01)
+        with pytest.raises(ExecutorBusyError):
+            await busy_executor.run(work, 2, key='a')
+        release.set()
+        return await first
+
+    assert asyncio.run(run_at_capacity()) == 1
+    busy_executor.shutdown()
+
+    with pytest.raises(asyncio.TimeoutError):
+        asyncio.run(executor.run(time.sleep, 0.2, timeout=0.01))
+    executor.shutdown()
+
+
+def test_response_cache():
+
+    # warming up does not fill the shared cache
+    stats = RESPONSE_CACHE.get_stats()
+    warm_up()
+    assert RESPONSE_CACHE.get_stats() == stats
+
+    cache = ResponseCache(max_entries=2)
+    first = handle_update_layout(base_request_data, cache=cache)
+    assert cache.get_stats()['misses'] == 1 and len(cache) == 1
+
+    # key order, viewport, and client_id do not matter
+    request = dict(reversed(list(base_request_data.items())), client_id='tab-2')
+    request['viewport'] = dict(base_request_data['viewport'], scale=100)
+    second = handle_update_layout(request, cache=cache)
+    assert second.body == first.body
+    assert cache.hits == 1 and cache.misses == 1
+
+    # actions and their arguments do
+    added = handle_update_layout(dict(base_request_data, action='add', new_type='axis'),
+                                 cache=cache)
+    handle_update_layout(dict(base_request_data, action='add', new_type='constant'),
+                         cache=cache)
+    assert len(json.loads(added.body)['elements']) == 3
+    assert len(cache) == 2 and cache.evictions == 1
+    assert cache.nbytes == sum(len(body) for _, body in cache._entries.values())
+
+    # bodies larger than the memory limit are not stored
+    cache = ResponseCache(max_bytes=100)
+    handle_update_layout(base_request_data, cache=cache)
+    assert len(cache) == 0 and cache.nbytes == 0
+
+    # concurrent use
+    cache = ResponseCache(max_entries=4)
+    requests = [dict(base_request_data, constants=[{'id': 'y_offset', 'value': 0.3},
+                                                   {'id': 'spacing', 'value': i % 8}])
+                for i in range(64)]
+    threads = [threading.Thread(target=lambda chunk=chunk: [
+        handle_update_layout(request, cache=cache) for request in chunk])
+        for chunk in (requests[i::4] for i in range(4))]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    stats = cache.get_stats()
+    assert stats['hits'] + stats['misses'] == 64 and stats['entries'] == 4
+
+
+def test_server(monkeypatch):
+
+    import uvicorn
+    from fastapi.testclient import TestClient
+    from pyplotdesigner.gui import main
+
+    calls = []
+    monkeypatch.setattr(uvicorn, 'run', lambda *args, **kwargs: calls.append(kwargs))
+    main.main([])
+    main.main(['--production', '--workers', '3', '--host', '0.0.0.0', '--port', '9000'])
+    assert calls[0]['reload'] is True and calls[0]['port'] == 8080
+    assert calls[1]['reload'] is False and calls[1]['workers'] == 3
+    assert (calls[1]['host'], calls[1]['port']) == ('0.0.0.0', 9000)
+    with pytest.raises(SystemExit):
+        main.main(['--workers', '2'])
+
+    # startup warms up the solver before the first request
+    with TestClient(main.app) as client:
+        elements = [dict(base_request_data['elements'][0], id=f'axis-{i}') for i in range(200)]
+        response = client.post('/api/update_layout', json={'elements': elements})
+        assert response.headers['content-encoding'] == 'gzip'
+        assert len(response.json()['elements']) == 200
+        response = client.post('/api/update_layout', json=base_request_data)
+        assert 'content-encoding' not in response.headers
+        assert client.get('/api/stats').json()['cache']['entries'] > 0
+
+
 if __name__ == "__main__":
 
     test_handle_layout()
@@ -209,3 +541,10 @@ if __name__ == "__main__":
     test_add()
     test_update()
     test_delete()
+    test_validation()
+    test_delta_response()
+    test_sessions()
+    test_live_updates(pytest.MonkeyPatch())
+    test_solve_executor()
+    test_response_cache()
+    test_server(pytest.MonkeyPatch())
@@ -0,0 +1,335 @@
+__copyright__ = """Copyright (C) 2025 George N. Wong"""
+__license__ = """
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in
+all copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+THE SOFTWARE.
+"""
+
+import io
+import json
+import base64
+
+import pytest
+
+import numpy as np
+
+from pyplotdesigner.core.design import Design
+from pyplotdesigner.core.archive import DesignArchive, write_archive
+from pyplotdesigner.core import json_backend
+from pyplotdesigner.core.decoding import LayoutDecoder, LayoutValidationError
+from pyplotdesigner.core.streaming import iter_sections
+
+
+def make_design():
+    design = Design(figure_width=6, figure_height=4)
+    spacing = design.add_constant(id='spacing', value=0.25)
+    ratio = design.add_constant(id='ratio', value=0.5)
+    left = design.add_element(id='left', type='axis', text='left é')
+    right = design.add_element(id='right', type='axis')
+    design.add_element(id='label', type='text', text='title')
+    design.add_constraint(left.x, 0.5)
+    design.add_constraint(left.width, 2.)
+    design.add_constraint(left.height, left.width, multiply=ratio.value)
+    design.add_constraint(right.x, left.right, add_after=spacing.value)
+    design.add_constraint(right.center_y, left.center_y)
+    design.add_constraint(right.width, add_before=1., multiply=3.)
+    design.solve()
+    return design
+
+
+def test_load_stream(tmp_path):
+
+    design = make_design()
+    json_str = design.get_json_string()
+    b64_str = design.get_b64_string()
+
+    # constraints written before the constants they reference
+    data = json.loads(json_str)
+    reordered = json.dumps(dict(constraints=data['constraints'], elements=data['elements'],
+                                constants=data['constants'], viewport=data['viewport']))
+
+    wrapped = '\n'.join(b64_str[i:i+76] for i in range(0, len(b64_str), 76))
+
+    sources = [
+        io.StringIO(json_str),
+        io.BytesIO(json_str.encode('utf-8')),
+        io.StringIO(reordered),
+        io.StringIO(b64_str),
+        io.BytesIO(('\n' + wrapped + '\n').encode('utf-8')),
+    ]
+    for chunk_size in (1, 7, 1 << 20):
+        for source in sources:
+            source.seek(0)
+            loaded = Design()
+            loaded.load_stream(source, chunk_size=chunk_size)
+            assert loaded.is_equivalent_to(design, verbose=True)
+            assert loaded.get_element('left').text == 'left é'
+
+    path = tmp_path / 'design.b64'
+    path.write_text(b64_str)
+    loaded = Design()
+    loaded.load_stream(path)
+    assert loaded.is_equivalent_to(design)
+
+
+def test_load_stream_bounded():
+
+    # without constants, constraints are added while the file is still being read
+    design = Design()
+    for i in range(50):
+        el = design.add_element(id=f'axis-{i}', type='axis')
+        design.add_constraint(el.x, 0.1 * i)
+    source = io.StringIO(design.get_json_string())
+    size = len(source.getvalue())
+    positions = []
+
+    class RecordingDesign(Design):
+        def add_constraint(self, *args, **kwargs):
+            positions.append(source.tell())
+            return super().add_constraint(*args, **kwargs)
+
+    loaded = RecordingDesign()
+    loaded.load_stream(source, chunk_size=256)
+    assert design.is_equivalent_to(loaded)
+    assert len(positions) == 50 and positions[0] < size // 2
+
+
+def test_load_stream_errors():
+
+    with pytest.raises(ValueError):
+        Design().load_stream(io.StringIO('{"elements": [{"id": "a"'))
+
+    truncated = base64.b64encode(b'{"elements": []}').decode()[:-2]
+    with pytest.raises(ValueError):
+        Design().load_stream(io.StringIO(truncated))
+
+
+def test_stream_numbers():
+
+    # bare numbers may be split anywhere between chunks
+    document = '{"values": [1.5, -2e-3, 3E+2, 10, true, null], "width": 6.25}'
+    expected = [('values', value) for value in json.loads(document)['values']]
+    expected.append(('width', 6.25))
+    for split in range(1, len(document)):
+        chunks = [document[:split], document[split:]]
+        assert list(iter_sections(chunks)) == expected
+
+    with pytest.raises(ValueError):
+        list(iter_sections(['{"values": [1.', ']}']))
+
+
+def test_binary_round_trip():
+
+    design = make_design()
+    design.add_element(id='untitled', type='text')
+    design.add_constraint(design.get_element('label').x, None, multiply=None)
+    data = design.get_bytes()
+
+    loaded = Design()
+    loaded.from_bytes(data)
+    assert loaded.is_equivalent_to(design, verbose=True)
+    assert loaded.get_element('untitled').text is None
+    assert loaded.get_element('left').text == 'left é'
+    assert loaded.get_figure_width() == 6 and loaded.get_figure_height() == 4
+    assert loaded.get_bytes() == data
+    assert loaded.get_constraint('label', 'x') is not None
+    assert len(data) < len(design.get_json_string())
+
+    loaded = Design(storage="array")
+    loaded.from_bytes(memoryview(data))
+    assert loaded.is_equivalent_to(design)
+
+    with pytest.raises(ValueError):
+        Design().from_bytes(b'PPDX' + data[4:])
+
+    # constraints are registered in bulk, and the first solve builds the graph
+    design = make_design()
+    loaded = Design()
+    loaded.from_bytes(design.get_bytes())
+    for d in (design, loaded):
+        d.solve()
+        d.get_constant('spacing').value.set(0.3)
+        d.solve()
+    assert loaded.is_equivalent_to(design, verbose=True)
+
+
+def test_archive(tmp_path):
+
+    designs = {}
+    for i in range(20):
+        design = make_design()
+        design.set_viewport(figure_width=3 + i % 4)
+        design.get_constant('spacing').value.set(0.1 * i)
+        for j in range(i % 3):
+            design.add_empty_element()
+        design.solve()
+        designs[f'layout-{i}'] = design
+
+    path = tmp_path / 'layouts.ppda'
+    write_archive(path, ((key, value) for key, value in designs.items()))
+
+    with DesignArchive(path) as archive:
+        assert len(archive) == 20
+        assert list(archive) == list(designs)
+        assert 'layout-3' in archive and 'missing' not in archive
+
+        assert np.allclose(archive.figure_sizes[:, 0], [3 + i % 4 for i in range(20)])
+        assert list(archive.element_counts) == [3 + i % 3 for i in range(20)]
+        wide = archive.figure_sizes[:, 0] > 4
+        selected = archive.ids[(archive.element_counts == 5) & wide]
+        assert list(selected) == ['layout-2', 'layout-11', 'layout-14']
+
+        entry = archive.get_entry(-1)
+        assert entry.id == 'layout-19' and entry.n_elements == 4 and entry.figure_width == 6
+
+        for key in ('layout-7', 7):
+            geometry = archive.get_geometry(key)
+            assert np.allclose(geometry, designs['layout-7'].get_geometry_array())
+            assert archive.open(key).is_equivalent_to(designs['layout-7'])
+        loaded = archive.open('layout-4', storage="array")
+        assert loaded.is_equivalent_to(designs['layout-4'])
+
+        with pytest.raises(KeyError):
+            archive.open('missing')
+
+
+def test_compact_json():
+
+    design = make_design()
+    design.add_constraint(design.get_element('label').x, None, multiply=None)
+    full = design.get_json_string()
+    compact = design.get_json_string(compact=True)
+    assert len(compact) < len(full)
+
+    payload = json.loads(compact)
+    assert payload['schema'] == 'compact'
+    constraints = payload['constraints']
+    assert constraints[0] == {'target': ['left', 'x'], 'source': 0.5}
+    assert constraints[2]['multiply'] == ['ratio']
+    assert constraints[3]['source'] == ['left', 'right']
+    assert constraints[-1] == {'target': ['label', 'x'], 'multiply': None}
+
+    for load in ('from_json_string', 'load_stream'):
+        loaded = Design()
+        if load == 'load_stream':
+            loaded.load_stream(io.StringIO(compact), chunk_size=16)
+        else:
+            loaded.from_json_string(compact)
+        assert loaded.is_equivalent_to(design, verbose=True)
+        assert loaded.constraints[-1].multiply is None
+        assert loaded.get_json_string() == full
+
+    loaded = Design()
+    loaded.load(design.get_b64_string(compact=True))
+    assert loaded.is_equivalent_to(design)
+
+
+def test_json_encoder():
+
+    design = make_design()
+    expected = design.get_json_string()
+    calls = []
+
+    def encoder(obj):
+        calls.append(obj)
+        return json.dumps(obj, separators=(',', ':')).encode('utf-8')
+
+    try:
+        json_backend.set_json_encoder(encoder)
+        assert design.get_json_string() == expected
+        assert len(calls) == 1
+        json_backend.set_json_encoder("auto")
+        assert json.loads(design.get_json_string()) == json.loads(expected)
+        with pytest.raises(ValueError):
+            json_backend.set_json_encoder("yaml")
+    finally:
+        json_backend.set_json_encoder(None)
+
+
+def test_decoder():
+
+    payload = json.loads(make_design().get_json_string())
+    payload['constraints'].append({'target': {'id': 'missing', 'attr': 'x'}})
+    payload['constraints'].append({'target': {'id': 'label', 'attr': 'y'},
+                                   'add_after': {'id': 'missing', 'attr': None},
+                                   'multiply': {'id': 'left', 'attr': 'depth'}})
+
+    # lenient decoding skips unknown targets and uses defaults for unknown inputs
+    design = LayoutDecoder().decode(payload, Design())
+    assert len(design.constraints) == 7
+    assert design.constraints[-1].add_after == 0 and design.constraints[-1].multiply == 1
+    assert design.get_figure_width() == 6
+
+    with pytest.raises(LayoutValidationError) as error:
+        LayoutDecoder(validate=True).decode(payload, Design())
+    assert error.value.path == 'constraints[6].target'
+    assert "element 'missing' not found" in str(error.value)
+
+    del payload['constraints'][6]
+    with pytest.raises(LayoutValidationError) as error:
+        LayoutDecoder(validate=True).decode(payload, Design())
+    assert error.value.path == 'constraints[6].multiply'
+
+    # numeric strings are coerced when decoding leniently, but rejected otherwise
+    payload['constraints'][6] = {'target': {'id': 'label', 'attr': 'y'},
+                                 'add_after': {'id': None, 'attr': '0.5'}}
+    design = LayoutDecoder().decode(payload, Design())
+    assert design.constraints[-1].add_after == 0.5
+    with pytest.raises(LayoutValidationError) as error:
+        LayoutDecoder(validate=True).decode(payload, Design())
+    assert error.value.path == 'constraints[6].add_after'
+
+    # constants cannot be the target of a constraint
+    payload['constraints'][6] = {'target': {'id': 'spacing', 'attr': None}, 'source': 1.}
+    with pytest.raises(LayoutValidationError) as error:
+        LayoutDecoder(validate=True).decode(payload, Design())
+    assert error.value.path == 'constraints[6].target'
+    design = LayoutDecoder().decode(payload, Design())
+    assert len(design.constraints) == 6
+    design.get_bytes()
+
+    for key, item, path in (('elements', {'id': 'a', 'x': 'left'}, 'elements[3].x'),
+                            ('elements', {'id': 'a', 'color': 'red'}, 'elements[3].color'),
+                            ('constants', {'id': 'a'}, 'constants[2].value')):
+        broken = json.loads(make_design().get_json_string())
+        broken[key].append(item)
+        with pytest.raises(LayoutValidationError) as error:
+            LayoutDecoder(validate=True).decode(broken, Design())
+        assert error.value.path == path
+
+    # valid payloads decode identically either way
+    payload = json.loads(make_design().get_json_string(compact=True))
+    strict = LayoutDecoder(validate=True).decode(payload, Design())
+    assert strict.is_equivalent_to(LayoutDecoder().decode(payload, Design()))
+
+
+if __name__ == "__main__":
+
+    import tempfile
+    import pathlib
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        test_load_stream(pathlib.Path(tmpdir))
+    test_load_stream_bounded()
+    test_load_stream_errors()
+    test_stream_numbers()
+    test_binary_round_trip()
+    test_compact_json()
+    test_json_encoder()
+    test_decoder()
+    with tempfile.TemporaryDirectory() as tmpdir:
+        test_archive(pathlib.Path(tmpdir))
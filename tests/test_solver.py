@@ -0,0 +1,340 @@
+__copyright__ = """Copyright (C) 2025 George N. Wong"""
+__license__ = """
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in
+all copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+THE SOFTWARE.
+"""
+
+import numpy as np
+import pytest
+
+from pyplotdesigner.core.design import Design
+from pyplotdesigner.core.models import SetValueConstraint
+
+
+def make_grid(rows, cols, reverse=False, storage="objects"):
+    """
+    Build a rows x cols grid of panels chained through computed attributes.
+    """
+    design = Design(storage=storage)
+    spacing = design.add_constant(id='spacing', value=0.1)
+    size = design.add_constant(id='size', value=0.5)
+    panels = [[design.add_element(id=f'p{i}-{j}', type='axis') for j in range(cols)]
+              for i in range(rows)]
+    constraints = []
+    for i in range(rows):
+        for j in range(cols):
+            panel = panels[i][j]
+            constraints.append((panel.width, size.value, {}))
+            constraints.append((panel.height, panel.width, {}))
+            if j == 0:
+                constraints.append((panel.x, 0.2, {}))
+            else:
+                constraints.append((panel.x, panels[i][j-1].right,
+                                    dict(add_after=spacing.value)))
+            if i == 0:
+                constraints.append((panel.y, 0.3, {}))
+            else:
+                constraints.append((panel.y, panels[i-1][j].top,
+                                    dict(add_after=spacing.value)))
+    if reverse:
+        constraints = constraints[::-1]
+    for target, source, kwargs in constraints:
+        design.add_constraint(target, source, **kwargs)
+    return design
+
+
+def test_solve_order_independent():
+
+    forward = make_grid(4, 5)
+    backward = make_grid(4, 5, reverse=True)
+    forward.solve()
+    backward.solve()
+
+    for el in forward.elements:
+        other = backward.get_element(el.id)
+        i, j = (int(v) for v in el.id[1:].split('-'))
+        assert np.allclose(el._x, 0.2 + 0.6 * j)
+        assert np.allclose(el._y, 0.3 + 0.6 * i)
+        assert np.allclose([other._x, other._y, other._width, other._height],
+                           [el._x, el._y, el._width, el._height])
+
+
+def test_solve_computed_target():
+
+    design = Design()
+    a = design.add_element(id='a', type='axis', width=2.)
+    b = design.add_element(id='b', type='axis')
+    design.add_constraint(a.right, b.left, add_after=-0.5)
+    design.add_constraint(b.x, 3.)
+    design.add_constraint(a.width, 1.5)
+    design.solve()
+
+    assert np.allclose(a._x, 1.)
+    assert np.allclose(a.right.get(), 2.5)
+
+
+def test_computed_linear_forms():
+
+    design = Design()
+    a = design.add_element(id='a', type='axis', x=1., y=2., width=3., height=4.)
+
+    assert a.left is a.x and a.bottom is a.y
+    assert a.right.get_coefficients() == {'_x': 1.0, '_width': 1.0}
+    read_slots = a.y.get_read_slots() + a.height.get_read_slots()
+    assert set(a.center_y.get_read_slots()) == set(read_slots)
+    assert a.center_y.get_write_slots() == a.y.get_write_slots()
+
+    a.center_x.set(5.)
+    assert np.allclose(a._x, 3.5)
+    a.top.set(10.)
+    assert np.allclose(a._y, 6.)
+    assert np.allclose(a.center_y.get(), 8.)
+
+
+def test_incremental_solve(monkeypatch):
+
+    design = make_grid(4, 5)
+    design.solve()
+
+    applied = []
+    original_apply = SetValueConstraint.apply
+
+    def counting_apply(self):
+        applied.append(self)
+        original_apply(self)
+
+    monkeypatch.setattr(SetValueConstraint, 'apply', counting_apply)
+
+    # nothing changed, so nothing to re-apply
+    assert design.solve() == []
+    assert len(applied) == 0
+
+    # the last panel only affects itself
+    last = design.get_element('p3-4')
+    design.get_constraint(last, 'width').set_attribute('source', 0.25)
+    assert design.solve() == applied
+    assert len(applied) == 2
+    assert np.allclose(last._height, 0.25)
+
+    # setting a value overwritten by a constraint restores the constraint
+    applied.clear()
+    design.get_element('p3-3').x.set(10.)
+    design.solve()
+    assert 0 < len(applied) < len(design.constraints)
+    assert np.allclose(design.get_element('p3-3')._x, 2.)
+
+    # constants feed every panel
+    applied.clear()
+    design.get_constant('spacing').value.set(0.2)
+    design.solve()
+    assert np.allclose(last._x, 0.2 + 4 * 0.7)
+
+    reference = make_grid(4, 5)
+    reference.get_constraint('p3-4', 'width').set_attribute('source', 0.25)
+    reference.get_constant('spacing').value.set(0.2)
+    reference.solve()
+    for el in reference.elements:
+        other = design.get_element(el.id)
+        assert np.allclose([other._x, other._y, other._width, other._height],
+                           [el._x, el._y, el._width, el._height])
+
+
+def test_incremental_solve_conflicting_writes():
+
+    def make_design():
+        design = Design()
+        a = design.add_element(id='a', type='axis')
+        e = design.add_element(id='e', type='axis')
+        # both constraints write e._x, the last registered one wins
+        design.add_constraint(e.x, a.top)
+        design.add_constraint(e.center_x, 1.)
+        design.add_constraint(a.height, 2.)
+        return design
+
+    design = make_design()
+    design.solve()
+    e = design.get_element('e')
+    assert np.allclose(e._x, 0.5)
+
+    e.width.set(0.5)
+    design.solve()
+    incremental = e._x
+    design.solve(full=True)
+    assert np.allclose(incremental, e._x)
+    assert np.allclose(e._x, 0.75)
+
+    reference = make_design()
+    reference.get_element('e').width.set(0.5)
+    reference.solve(vectorize=True)
+    assert np.allclose(reference.get_element('e')._x, 0.75)
+
+    # removing the winning writer re-solves the remaining one downstream
+    f = design.add_element(id='f', type='axis')
+    design.add_constraint(f.x, e.right)
+    design.solve()
+    design.remove_constraint(design.get_constraint('e', 'center_x'))
+    design.solve()
+    incremental = (e._x, f._x)
+    design.solve(full=True)
+    assert np.allclose(incremental, (e._x, f._x))
+    assert np.allclose(e._x, 2.)
+
+
+def test_bulk_constraints():
+
+    design = Design()
+    a = design.add_element(id='a', type='axis')
+    b = design.add_element(id='b', type='axis')
+    first = design.add_constraint(a.x, 1.)
+    design.solve()
+
+    # constraints added in bulk are picked up by the next solve, whatever
+    # else was added or removed in between
+    bulk = SetValueConstraint(target=b.x, source=a.right)
+    design._add_constraints([bulk])
+    design.add_constraint(a.width, 2.)
+    design.remove_constraint(first)
+    design.solve()
+    assert bulk in design._graph
+    assert np.allclose(b._x, 3.)
+    assert not design._graph_stale
+
+
+def test_array_storage():
+
+    reference = make_grid(3, 4)
+    design = make_grid(3, 4, storage="array")
+    reference.solve()
+    design.solve()
+
+    geometry = design.get_geometry_array()
+    assert geometry.shape == (12, 4)
+    assert np.allclose(geometry, reference.get_geometry_array())
+
+    # variables are views onto the shared array
+    panel = design.get_element('p1-2')
+    panel.center_x.set(5.)
+    assert np.allclose(geometry[6], [4.75, panel._y, 0.5, 0.5])
+    assert panel.right == panel.right and panel.left == panel.x
+
+    # removing an element keeps the remaining rows aligned with the elements
+    before = geometry.copy()
+    removed = design.get_element('p0-1')
+    design.remove_element_by_id('p0-1')
+    geometry = design.get_geometry_array()
+    assert len(geometry) == 11
+    assert np.allclose(geometry[0], before[0])
+    assert np.allclose(geometry[1:], before[2:])
+    for row, el in zip(design.get_geometry_array(), design.elements):
+        assert np.allclose(row, [el.x.get(), el.y.get(), el.width.get(), el.height.get()])
+
+    # the removed element keeps its geometry without touching its old row
+    assert np.allclose([removed._x, removed._y], before[1][:2])
+    removed.x.set(99.)
+    assert removed._x == 99. and removed._design is None
+    assert np.allclose(design.get_geometry_array()[1:], before[2:])
+
+
+def test_vectorized_solve():
+
+    for storage in ("objects", "array"):
+        reference = make_grid(5, 6, reverse=True)
+        design = make_grid(5, 6, reverse=True, storage=storage)
+        for d in (reference, design):
+            a = d.get_element('p4-5')
+            b = d.get_element('p0-0')
+            d.add_constraint(b.center_y, a.top, multiply=d.get_constant('size').value,
+                             add_before=-1.)
+            d.add_constraint(a.height, a.width, multiply=2.)
+        reference.solve()
+        design.solve(vectorize=True)
+        assert np.allclose(design.get_geometry_array(), reference.get_geometry_array())
+
+        # the compiled plan picks up new constant values
+        for d in (reference, design):
+            d.get_constant('spacing').value.set(0.3)
+        reference.solve()
+        design.solve(vectorize=True)
+        assert np.allclose(design.get_geometry_array(), reference.get_geometry_array())
+
+
+def test_compiled_plan():
+
+    design = make_grid(3, 4)
+    plan = design.compile()
+    assert plan.constant_ids == ['spacing', 'size']
+    assert plan.element_ids[:2] == ['p0-0', 'p0-1']
+
+    geometry = plan.solve(constants={'spacing': 0.3})
+    design.get_constant('spacing').value.set(0.3)
+    design.solve()
+    assert np.allclose(geometry, design.get_geometry_array())
+
+    scenarios = [[0.1, 0.5], [0.2, 0.4], [0., 1.]]
+    geometries = plan.solve_batch(scenarios)
+    assert geometries.shape == (3, 12, 4)
+    for row, geometry in zip(scenarios, geometries):
+        assert np.allclose(geometry, plan.solve(dict(spacing=row[0], size=row[1])))
+
+    geometries = plan.solve_batch([[0.4], [0.8]], constant_ids=['size'])
+    assert np.allclose(geometries[:, :, 2], [[0.4], [0.8]])
+
+    with pytest.raises(ValueError):
+        plan.solve(constants={'missing': 1.})
+
+
+def test_solve_batch():
+
+    design = make_grid(2, 3)
+    scenarios = np.array([[0.1 * i, 0.2 + 0.05 * i] for i in range(20)])
+
+    geometries = design.solve_batch(scenarios, constant_ids=['spacing', 'size'])
+    assert geometries.shape == (20, 6, 4)
+    assert np.allclose(geometries[:, 5, 0], 0.2 + 2 * scenarios.sum(axis=1))
+
+    parallel = design.solve_batch(scenarios, constant_ids=['spacing', 'size'], processes=2)
+    assert np.allclose(parallel, geometries)
+
+    # the design itself is unchanged
+    assert design.get_constant('spacing').value.get() == 0.1
+
+
+def test_solve_circular_through_alias():
+
+    design = Design()
+    a = design.add_element(id='a', type='axis')
+    b = design.add_element(id='b', type='axis')
+    design.add_constraint(a.x, b.right)
+    design.add_constraint(b.width, a.center_x)
+
+    with pytest.raises(RuntimeError):
+        design.solve()
+
+
+if __name__ == "__main__":
+
+    test_solve_order_independent()
+    test_solve_computed_target()
+    test_computed_linear_forms()
+    test_incremental_solve_conflicting_writes()
+    test_bulk_constraints()
+    test_array_storage()
+    test_vectorized_solve()
+    test_compiled_plan()
+    test_solve_batch()
+    test_solve_circular_through_alias()